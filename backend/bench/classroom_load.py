@@ -0,0 +1,330 @@
+"""Classroom-scale load test: how many students can one backend serve?
+
+Spawns the backend (`uvicorn main:app`, one worker) against the stub LLM
+HTTP server (bench.stub_llm) and ramps up the number of simulated
+students N. Per level, for --duration seconds:
+
+  camera    one client pushes synthetic landmarks at 30 Hz over
+            /gaze/push?kind=landmarks. The tracker is single-source, so
+            one pusher stands in for the camera and all students share
+            its gaze stream.
+  students  each opens /gaze/ws and calibrates via
+            /gaze/calibrate/capture (5 points). Then it loops question ->
+            explanation -> follow-ups with --think seconds between steps.
+
+Reported per N: HTTP throughput, p50/p95/p99 per endpoint, error rate,
+gaze WS delivery latency and inter-message jitter, and server CPU/RSS
+(sampled from /proc, so Linux only). The ramp doubles N until a level
+breaks the SLOs. It then bisects between the last good and first bad
+level (--refine steps) and reports the saturation point.
+
+The load generator shares the machine with the server; on small hosts
+its own CPU use caps what can be measured (printed as "client cpu").
+
+    python -m bench.classroom_load [--start 5] [--max 160] [--duration 20]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import urllib.request
+
+import httpx
+import numpy as np
+import websockets
+
+from bench import stub_llm
+from bench.lecture_load import SEGMENT
+from services.synthetic_face import render_landmarks
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+CAMERA_HZ = 30
+PUSH_TOKEN = "bench"  # GAZE_PUSH_TOKEN for the spawned backend
+QUESTION = "Why does a large learning rate overshoot?"
+
+
+# -------------------------
+# Server process
+# -------------------------
+def start_backend(port, llm_port):
+    env = dict(os.environ, GAZE_SOURCE="none", GAZE_PUSH_TOKEN=PUSH_TOKEN, OPENAI_API_KEY="stub",
+               OPENAI_API_BASE=f"http://127.0.0.1:{llm_port}/v1")
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=0.5)
+            return proc
+        except OSError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError("backend did not start")
+
+
+class ProcSampler:
+    """CPU % (of one core) and RSS of a process, from /proc."""
+
+    def __init__(self, pid):
+        self.pid = pid
+        self.tick = os.sysconf("SC_CLK_TCK")
+        self.cpu, self.rss = [], []
+
+    def _cpu_s(self):
+        with open(f"/proc/{self.pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / self.tick  # utime + stime
+
+    def _rss_mb(self):
+        with open(f"/proc/{self.pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+        return 0.0
+
+    async def run(self, stop, period=0.5):
+        prev_cpu, prev_t = self._cpu_s(), time.monotonic()
+        while not stop.is_set():
+            await asyncio.sleep(period)
+            cpu, t = self._cpu_s(), time.monotonic()
+            self.cpu.append(100 * (cpu - prev_cpu) / (t - prev_t))
+            self.rss.append(self._rss_mb())
+            prev_cpu, prev_t = cpu, t
+
+
+# -------------------------
+# Clients
+# -------------------------
+class Stats:
+    def __init__(self):
+        self.latency = {}  # endpoint -> [s]
+        self.errors = {}
+        self.ws_delivery_ms = []
+        self.ws_gaps_ms = []
+        self.ws_messages = 0
+
+    def record(self, endpoint, seconds, ok):
+        self.latency.setdefault(endpoint, [])
+        self.errors.setdefault(endpoint, 0)
+        if ok:
+            self.latency[endpoint].append(seconds)
+        else:
+            self.errors[endpoint] += 1
+
+
+def camera_frames(n=CAMERA_HZ * 4):
+    """Pre-rendered landmark messages for a gaze slowly circling the screen."""
+    rng = np.random.default_rng(0)
+    out = []
+    for i in range(n):
+        a = 2 * np.pi * i / n
+        lm = render_landmarks((0.5 + 0.3 * np.cos(a), 0.5 + 0.3 * np.sin(a)), noise=0.0003, rng=rng)
+        out.append(json.dumps({"landmarks": np.round(lm, 5).tolist()}))
+    return out
+
+
+async def camera(ws_base, frames, stop):
+    async with websockets.connect(f"{ws_base}/gaze/push?kind=landmarks&token={PUSH_TOKEN}", max_size=None) as ws:
+        t_next, i = time.monotonic(), 0
+        while not stop.is_set():
+            await ws.send(frames[i % len(frames)])
+            i += 1
+            t_next += 1 / CAMERA_HZ
+            await asyncio.sleep(max(0.0, t_next - time.monotonic()))
+
+
+async def gaze_reader(ws_base, stats, stop):
+    try:
+        async with websockets.connect(f"{ws_base}/gaze/ws") as ws:
+            last = None
+            while not stop.is_set():
+                try:
+                    msg = json.loads(await asyncio.wait_for(ws.recv(), 1.0))
+                except asyncio.TimeoutError:
+                    continue
+                now = time.time() * 1000
+                stats.ws_messages += 1
+                if msg.get("calibrated"):
+                    stats.ws_delivery_ms.append(now - msg["ts_ms"])
+                if last is not None:
+                    stats.ws_gaps_ms.append(now - last)
+                last = now
+    except (OSError, websockets.WebSocketException):
+        stats.record("gaze_ws", 0, False)
+
+
+async def timed_post(client, stats, endpoint, path, body):
+    t0 = time.perf_counter()
+    try:
+        r = await client.post(path, json=body)
+        ok = r.status_code == 200
+    except httpx.HTTPError:
+        r, ok = None, False
+    stats.record(endpoint, time.perf_counter() - t0, ok)
+    return r.json() if ok else None
+
+
+async def student(client, ws_base, stats, stop, think):
+    reader = asyncio.create_task(gaze_reader(ws_base, stats, stop))
+    for _ in range(5):
+        await timed_post(client, stats, "calibrate", "/gaze/calibrate/capture", {})
+        await asyncio.sleep(0.2)
+    while not stop.is_set():
+        q = await timed_post(client, stats, "questions", "/get-educational-questions", {"prompt": SEGMENT})
+        await asyncio.sleep(random.uniform(*think))
+        question = (q or {}).get("questions", [QUESTION])[0] if q else QUESTION
+        e = await timed_post(client, stats, "explanation", "/get-educational-explanation",
+                             {"prompt": SEGMENT, "question": question})
+        if e:
+            await timed_post(client, stats, "followups", "/get-followup-questions",
+                             {"prompt": SEGMENT, "question": question, "explanation": e["explanation"]})
+        await asyncio.sleep(random.uniform(*think))
+    await reader
+
+
+async def run_level(n, base, ws_base, frames, server_pid, args):
+    stats, stop = Stats(), asyncio.Event()
+    server = ProcSampler(server_pid)
+    client_proc = ProcSampler(os.getpid())
+    async with httpx.AsyncClient(base_url=base, timeout=60,
+                                 limits=httpx.Limits(max_connections=None)) as client:
+        tasks = [asyncio.create_task(camera(ws_base, frames, stop)),
+                 asyncio.create_task(server.run(stop)),
+                 asyncio.create_task(client_proc.run(stop))]
+        await asyncio.sleep(0.5)
+        for _ in range(n):
+            tasks.append(asyncio.create_task(student(client, ws_base, stats, stop, args.think)))
+            await asyncio.sleep(args.ramp / n)
+        await asyncio.sleep(args.duration)
+        stop.set()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    # Calibration is global: start every level uncalibrated
+    urllib.request.urlopen(urllib.request.Request(f"{base}/gaze/calibrate/reset", method="POST"))
+    return stats, server, client_proc
+
+
+# -------------------------
+# Reporting
+# -------------------------
+ENDPOINTS = ("calibrate", "questions", "explanation", "followups")
+
+
+def pct(values, q):
+    return float(np.percentile(values, q)) if len(values) else float("nan")
+
+
+def summarize(n, stats, server, client_proc, duration):
+    done = sum(len(v) for v in stats.latency.values())
+    errors = sum(stats.errors.values())
+    gaps = np.asarray(stats.ws_gaps_ms)
+    jitter = np.abs(gaps - np.median(gaps)) if len(gaps) else gaps
+    return {
+        "n": n,
+        "rps": done / duration,
+        "error_rate": errors / max(1, done + errors),
+        "endpoints": {ep: (pct(stats.latency.get(ep, []), 50), pct(stats.latency.get(ep, []), 95),
+                           pct(stats.latency.get(ep, []), 99), stats.errors.get(ep, 0))
+                      for ep in ENDPOINTS},
+        "ws_msgs": stats.ws_messages / duration,
+        "ws_delivery_p95": pct(stats.ws_delivery_ms, 95),
+        "ws_jitter_p95": pct(jitter, 95),
+        "cpu": pct(server.cpu, 50),
+        "cpu_max": max(server.cpu, default=float("nan")),
+        "rss": max(server.rss, default=float("nan")),
+        "client_cpu": pct(client_proc.cpu, 50),
+    }
+
+
+def print_level(s):
+    print(f"\nN={s['n']:<4} {s['rps']:6.1f} req/s   errors {100 * s['error_rate']:4.1f}%   "
+          f"server cpu {s['cpu']:5.1f}% (max {s['cpu_max']:5.1f}%)   rss {s['rss']:6.1f} MB   "
+          f"client cpu {s['client_cpu']:5.1f}%")
+    for ep, (p50, p95, p99, err) in s["endpoints"].items():
+        print(f"  {ep:<12} p50 {1000 * p50:7.0f} ms   p95 {1000 * p95:7.0f} ms   p99 {1000 * p99:7.0f} ms"
+              f"   errors {err}")
+    print(f"  {'gaze ws':<12} {s['ws_msgs']:7.0f} msg/s   delivery p95 {s['ws_delivery_p95']:6.1f} ms   "
+          f"jitter p95 {s['ws_jitter_p95']:6.1f} ms")
+
+
+def violations(s, args):
+    out = []
+    if s["error_rate"] > args.max_errors:
+        out.append(f"error rate {100 * s['error_rate']:.1f}%")
+    p95 = s["endpoints"]["explanation"][1]
+    if not p95 <= args.slo_explanation:
+        out.append(f"explanation p95 {p95:.2f} s")
+    if not s["ws_jitter_p95"] <= args.slo_jitter_ms:
+        out.append(f"ws jitter p95 {s['ws_jitter_p95']:.0f} ms")
+    if not s["ws_delivery_p95"] <= args.slo_delivery_ms:
+        out.append(f"ws delivery p95 {s['ws_delivery_p95']:.0f} ms")
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--start", type=int, default=5)
+    ap.add_argument("--max", type=int, default=160)
+    ap.add_argument("--duration", type=float, default=20.0, help="seconds measured per level")
+    ap.add_argument("--ramp", type=float, default=2.0, help="seconds to connect all students")
+    ap.add_argument("--think", type=float, nargs=2, default=(1.0, 3.0), help="think time range (s)")
+    ap.add_argument("--refine", type=int, default=2, help="bisection steps after the first failure")
+    ap.add_argument("--latency", type=float, default=1.0, help="stub model latency (s)")
+    ap.add_argument("--tokens-per-min", type=float, default=None, help="stub provider rate limit")
+    ap.add_argument("--slo-explanation", type=float, default=None, help="p95 s (default 3x latency)")
+    ap.add_argument("--slo-jitter-ms", type=float, default=50.0)
+    ap.add_argument("--slo-delivery-ms", type=float, default=100.0)
+    ap.add_argument("--max-errors", type=float, default=0.01)
+    ap.add_argument("--port", type=int, default=8794)
+    ap.add_argument("--llm-port", type=int, default=8799)
+    args = ap.parse_args()
+    args.slo_explanation = args.slo_explanation or 3 * args.latency
+
+    stub_llm.serve(args.llm_port, args.latency, args.latency * 0.2, args.tokens_per_min)
+    proc = start_backend(args.port, args.llm_port)
+    base, ws_base = f"http://127.0.0.1:{args.port}", f"ws://127.0.0.1:{args.port}"
+    frames = camera_frames()
+
+    def level(n):
+        stats, server, client_proc = asyncio.run(run_level(n, base, ws_base, frames, proc.pid, args))
+        s = summarize(n, stats, server, client_proc, args.duration)
+        print_level(s)
+        bad = violations(s, args)
+        print(f"  -> {'FAIL: ' + ', '.join(bad) if bad else 'ok'}")
+        return not bad
+
+    try:
+        good, bad, n = None, None, args.start
+        while n <= args.max:
+            if level(n):
+                good, n = n, n * 2
+            else:
+                bad = n
+                break
+        for _ in range(args.refine if good and bad else 0):
+            mid = (good + bad) // 2
+            if mid in (good, bad):
+                break
+            if level(mid):
+                good = mid
+            else:
+                bad = mid
+        print()
+        if bad is None:
+            print(f"No saturation up to N={good} (raise --max)")
+        elif good is None:
+            print(f"Already saturated at N={bad} (lower --start)")
+        else:
+            print(f"Saturation point: {good} students OK, {bad} breaks the SLOs")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+if __name__ == "__main__":
+    main()
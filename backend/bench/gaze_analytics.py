@@ -0,0 +1,121 @@
+"""Streaming gaze analytics (services.gaze_analytics) vs. keeping raw samples.
+
+Feeds a 30 Hz gaze path (fixations on question tiles, saccades, pursuit;
+see bench.gaze_latency_replay) of --minutes length into one session.
+
+  streaming  GazeAnalytics.add per sample; summary + heatmap at the end
+  raw        samples appended to a list; heatmap (np.histogram2d) and
+             tile dwell computed from them at the end
+
+Reports per-sample cost, memory held per session after 1 minute and
+after the full length, time to produce the summary, and that both give
+the same heatmap.
+
+    python -m bench.gaze_analytics [--minutes 60]
+"""
+import argparse
+import json
+import time
+import tracemalloc
+
+import numpy as np
+
+from bench.gaze_latency_replay import SIM_HZ, true_path
+from services.gaze_analytics import (
+    HEATMAP_COLS,
+    HEATMAP_ROWS,
+    TILE_COUNT,
+    GazeAnalytics,
+    tile_at,
+)
+
+CAMERA_HZ = 30
+
+
+def samples(minutes, seed=0):
+    """(x, y, capture_s) at CAMERA_HZ, with a little jitter on frame times."""
+    rng = np.random.default_rng(seed)
+    xy = true_path(minutes * 60, rng)[0][:: SIM_HZ // CAMERA_HZ]
+    xy = np.clip(xy + rng.normal(0, 0.01, xy.shape), 0, 1)
+    t = 1.7e9 + np.cumsum(rng.normal(1 / CAMERA_HZ, 0.002, len(xy)))
+    return [(float(x), float(y), float(c)) for (x, y), c in zip(xy, t)]
+
+
+def traced(fn, rows, checkpoint):
+    """Memory allocated (and still held) after `checkpoint` rows and after all of them."""
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    early = None
+    for i, row in enumerate(rows):
+        fn(row)
+        if i == checkpoint:
+            early = tracemalloc.get_traced_memory()[0] - base
+    mem = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    return early, mem
+
+
+def streaming(rows, checkpoint):
+    # Timed and memory-traced separately: tracemalloc slows every call
+    agg = GazeAnalytics()
+    agg.start("bench")
+    mem_early, mem = traced(lambda row: agg.add(*row), rows, checkpoint)
+    agg = GazeAnalytics()
+    agg.start("bench")
+    t0 = time.perf_counter()
+    for x, y, c in rows:
+        agg.add(x, y, c)
+    per_sample = (time.perf_counter() - t0) / len(rows)
+    t0 = time.perf_counter()
+    out = agg.summary(heatmap=True)["sessions"][0]
+    summary_s = time.perf_counter() - t0
+    return per_sample, mem_early, mem, summary_s, out, agg.current.heatmap
+
+
+def raw(rows, checkpoint):
+    # Fresh floats and tuple per sample, as the tracker would create them
+    kept = []
+    keep = lambda row: kept.append((row[0] * 1.0, row[1] * 1.0, row[2] * 1.0))  # noqa: E731
+    mem_early, mem = traced(keep, rows, checkpoint)
+    kept = []
+    t0 = time.perf_counter()
+    for row in rows:
+        keep(row)
+    per_sample = (time.perf_counter() - t0) / len(rows)
+
+    t0 = time.perf_counter()
+    a = np.asarray(kept)
+    dt = np.diff(a[:, 2])
+    x, y = a[1:, 0], a[1:, 1]
+    heatmap, _, _ = np.histogram2d(y, x, bins=(HEATMAP_ROWS, HEATMAP_COLS), range=((0, 1), (0, 1)), weights=dt)
+    tiles = np.array([tile_at(px, py) for px, py in zip(x, y)])
+    dwell = np.bincount(tiles[tiles >= 0], weights=dt[tiles >= 0], minlength=TILE_COUNT)
+    summary_s = time.perf_counter() - t0
+    return per_sample, mem_early, mem, summary_s, dwell, heatmap
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--minutes", type=float, default=60)
+    args = ap.parse_args()
+
+    rows = samples(args.minutes)
+    checkpoint = 60 * CAMERA_HZ
+    print(f"{len(rows)} samples ({args.minutes:.0f} min at {CAMERA_HZ} Hz)")
+
+    s_cost, s_early, s_mem, s_sum, out, s_heat = streaming(rows, checkpoint)
+    r_cost, r_early, r_mem, r_sum, dwell, r_heat = raw(rows, checkpoint)
+
+    kb = lambda b: f"{b / 1024:8.1f} KB"  # noqa: E731
+    print(f"  streaming  {s_cost * 1e6:5.2f} us/sample   memory 1 min {kb(s_early)}   "
+          f"{args.minutes:.0f} min {kb(s_mem)}   summary {s_sum * 1000:6.1f} ms   "
+          f"payload {len(json.dumps(out))} bytes")
+    print(f"  raw        {r_cost * 1e6:5.2f} us/sample   memory 1 min {kb(r_early)}   "
+          f"{args.minutes:.0f} min {kb(r_mem)}   summary {r_sum * 1000:6.1f} ms")
+    ours = np.array([t["dwell_s"] for t in out["tiles"]])
+    print(f"  max heatmap difference {np.abs(s_heat - r_heat).max():.2e} s, "
+          f"max tile dwell difference {np.abs(ours - dwell).max():.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Replay benchmark: single-iris vs binocular + head-pose gaze features.
+
+Calibrates both feature models on the 5-point routine with a still head,
+then replays frames where the head drifts and turns. Reports per-frame
+feature cost and mean screen error (fraction of screen diagonal).
+
+The "mp objects" row feeds the same frames as MediaPipe NormalizedLandmark
+lists, which is what the served FaceLandmarker path hands to
+gaze_features (replays and pushed landmarks are arrays).
+
+    python -m bench.gaze_features_replay [--frames 5000]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from services import gaze_features
+from services.synthetic_face import render_landmarks, head_matrix
+
+CALIB_TARGETS = [(0.0, 0.0), (1.0, 0.0), (0.0, 1.0), (1.0, 1.0), (0.5, 0.5)]
+
+
+def calibrate(feature_fn, rng, noise):
+    still = head_matrix(0.0, 0.0)
+    return [list(feature_fn(render_landmarks(t, noise=noise, rng=rng), still)) for t in CALIB_TARGETS]
+
+
+def replay(frames, rng, noise):
+    for _ in range(frames):
+        target = tuple(rng.uniform(0.05, 0.95, size=2))
+        yaw, pitch = rng.uniform(-0.15, 0.15), rng.uniform(-0.10, 0.10)
+        offset = tuple(rng.uniform(-0.05, 0.05, size=2))
+        lm = render_landmarks(target, yaw, pitch, offset, noise=noise, rng=rng)
+        yield target, lm, head_matrix(yaw, pitch)
+
+
+def as_mediapipe(samples):
+    """Same frames with landmarks as NormalizedLandmark objects (as FaceLandmarker returns them)."""
+    from mediapipe.tasks.python.components.containers.landmark import NormalizedLandmark
+    return [
+        (target, [NormalizedLandmark(x=float(x), y=float(y), z=float(z)) for x, y, z in lm], mat)
+        for target, lm, mat in samples
+    ]
+
+
+def run(name, feature_fn, samples, corners):
+    errs = []
+    t0 = time.perf_counter()
+    for target, lm, mat in samples:
+        x, y = gaze_features.map_to_screen(*feature_fn(lm, mat), corners)
+        errs.append(np.hypot(x - target[0], y - target[1]) / np.sqrt(2))
+    dt = (time.perf_counter() - t0) / len(samples)
+    print(f"{name:<30} {dt * 1e6:8.1f} us/frame   mean err {np.mean(errs):.4f}   p95 {np.percentile(errs, 95):.4f}")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--frames", type=int, default=5000)
+    ap.add_argument("--noise", type=float, default=0.0003)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    samples = list(replay(args.frames, rng, args.noise))
+
+    single = lambda lm, mat=None: gaze_features.single_eye_features(lm)
+    bino_lm = lambda lm, mat=None: gaze_features.eye_features(lm)
+    bino_mat = lambda lm, mat=None: gaze_features.eye_features(lm, mat)
+
+    corners = {}
+    for name, fn in (
+        ("single iris (baseline)", single),
+        ("binocular + head (lmk)", bino_lm),
+        ("binocular + head (matrix)", bino_mat),
+    ):
+        corners[fn] = calibrate(fn, rng, args.noise)
+        run(name, fn, samples, corners[fn])
+
+    try:
+        mp_samples = as_mediapipe(samples)
+    except ImportError:
+        print("mediapipe not installed: skipping the landmark-object rows")
+        return
+    for name, fn in (
+        ("single iris (mp objects)", single),
+        ("binocular + head (mp objects)", bino_mat),
+    ):
+        # Same calibration as the array rows: only the landmark container differs
+        run(name, fn, mp_samples, corners[fn])
+
+
+if __name__ == "__main__":
+    main()
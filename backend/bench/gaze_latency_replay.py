@@ -0,0 +1,133 @@
+"""Replay evaluation of latency-compensated gaze (services.gaze_predict).
+
+Simulates what the student sees. A ground-truth gaze path (fixations,
+saccades between question tiles, slow pursuit) is sampled by a 30 Hz
+camera with measurement noise. Each sample goes through a pipeline delay,
+the tracker's EMA, and /gaze/ws polling at 30 Hz. The dot then shows the
+newest received sample until the next one, either x/y (today) or the
+predicted px/py.
+
+Reports, against the true gaze at display time:
+  lag        time shift that best aligns displayed and true paths
+  error      mean distance between dot and true gaze (screen fractions)
+  overshoot  how far the dot passes a saccade's landing point (p50/p95)
+
+    python -m bench.gaze_latency_replay [--seconds 120] [--delay-ms 45]
+"""
+import argparse
+
+import numpy as np
+
+from services.gaze_predict import MotionPredictor, WS_POLL_S
+from services.gaze_tracker import SMOOTH_ALPHA_X, SMOOTH_ALPHA_Y
+
+SIM_HZ = 1000
+CAMERA_HZ = 30
+
+
+def true_path(seconds, rng):
+    """Ground-truth gaze at SIM_HZ, plus (landing index, target, direction) per saccade."""
+    n = int(seconds * SIM_HZ)
+    xy = np.empty((n, 2))
+    saccades = []
+    pos = np.array([0.5, 0.5])
+    i = 0
+    while i < n:
+        if rng.random() < 0.15:
+            # Smooth pursuit: follow a slow moving target for ~1-2 s
+            dur = int(rng.uniform(1.0, 2.0) * SIM_HZ)
+            vel = rng.uniform(-0.25, 0.25, 2)
+            t = np.arange(1, min(dur, n - i) + 1)[:, None] / SIM_HZ
+            seg = np.clip(pos + vel * t, 0.05, 0.95)
+            xy[i:i + len(seg)] = seg
+            pos = seg[-1]
+            i += len(seg)
+            continue
+        # Saccade (30-60 ms, smooth profile) to a tile centre, then fixate
+        target = np.array([(rng.integers(3) + 0.5) / 3, (rng.integers(2) + 0.5) / 2])
+        target += rng.normal(0, 0.03, 2)
+        dur = int(rng.uniform(0.03, 0.06) * SIM_HZ)
+        s = (1 - np.cos(np.linspace(0, np.pi, dur))) / 2
+        seg = pos + (target - pos) * s[:, None]
+        fix = int(rng.uniform(0.25, 0.9) * SIM_HZ)
+        seg = np.vstack([seg, np.repeat(target[None], fix, 0)])[: n - i]
+        xy[i:i + len(seg)] = seg
+        if np.linalg.norm(target - pos) > 0.1 and i + dur < n:
+            saccades.append((i + dur, target.copy(), (target - pos) / np.linalg.norm(target - pos), fix))
+        pos = target
+        i += len(seg)
+    return xy, saccades
+
+
+def simulate(truth, rng, delay_ms, jitter_ms, noise, predict):
+    """Displayed dot position at SIM_HZ."""
+    n = len(truth)
+    predictor = MotionPredictor(SMOOTH_ALPHA_X, SMOOTH_ALPHA_Y)
+    sx, sy = 0.5, 0.5
+    step = SIM_HZ // CAMERA_HZ
+    publishes = []  # (publish index, x, y)
+    for cap in range(0, n, step):
+        meas = truth[cap] + rng.normal(0, noise, 2)
+        sx = sx * (1 - SMOOTH_ALPHA_X) + meas[0] * SMOOTH_ALPHA_X
+        sy = sy * (1 - SMOOTH_ALPHA_Y) + meas[1] * SMOOTH_ALPHA_Y
+        pub = cap + int(max(1.0, rng.normal(delay_ms, jitter_ms)) * SIM_HZ / 1000)
+        pred = predictor.update(sx, sy, cap / SIM_HZ, pub / SIM_HZ)
+        publishes.append((pub, pred.px, pred.py) if predict else (pub, sx, sy))
+
+    # /gaze/ws: every WS_POLL_S the newest published sample is sent
+    shown = np.full((n, 2), 0.5)
+    poll = int(WS_POLL_S * SIM_HZ)
+    phase = int(rng.integers(poll))
+    j, cur = 0, (0.5, 0.5)
+    for t in range(phase, n, poll):
+        while j < len(publishes) and publishes[j][0] <= t:
+            cur = publishes[j][1:]
+            j += 1
+        shown[t:t + poll] = cur
+    return shown
+
+
+def perceived_lag_ms(truth, shown, max_ms=500):
+    skip = SIM_HZ  # let the EMA settle
+    best, best_err = 0, np.inf
+    for lag in range(0, max_ms + 1, 2):
+        k = lag * SIM_HZ // 1000
+        err = np.mean(np.linalg.norm(shown[skip + k:] - truth[skip:len(truth) - k], axis=1))
+        if err < best_err:
+            best, best_err = lag, err
+    return best
+
+
+def overshoot(shown, saccades):
+    """Max excursion past each landing point along the saccade direction."""
+    out = []
+    for land, target, direction, fix in saccades:
+        window = shown[land:land + min(fix, 400)]
+        if len(window):
+            out.append(max(0.0, float(np.max((window - target) @ direction))))
+    return np.array(out)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--seconds", type=float, default=120)
+    ap.add_argument("--delay-ms", type=float, default=45, help="capture -> publish pipeline delay")
+    ap.add_argument("--jitter-ms", type=float, default=10)
+    ap.add_argument("--noise", type=float, default=0.01, help="per-frame gaze noise (screen fractions)")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    truth, saccades = true_path(args.seconds, np.random.default_rng(args.seed))
+    print(f"{args.seconds:.0f} s replay, {len(saccades)} saccades, pipeline delay "
+          f"{args.delay_ms:.0f}±{args.jitter_ms:.0f} ms, noise {args.noise}")
+    for name, predict in (("raw x/y", False), ("predicted", True)):
+        shown = simulate(truth, np.random.default_rng(args.seed + 1), args.delay_ms,
+                         args.jitter_ms, args.noise, predict)
+        err = np.mean(np.linalg.norm(shown[SIM_HZ:] - truth[SIM_HZ:], axis=1))
+        ov = overshoot(shown, saccades)
+        print(f"  {name:<10} lag {perceived_lag_ms(truth, shown):4d} ms   error {err:.4f}   "
+              f"overshoot p50 {np.percentile(ov, 50):.4f}  p95 {np.percentile(ov, 95):.4f}")
+
+
+if __name__ == "__main__":
+    main()
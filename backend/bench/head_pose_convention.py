@@ -0,0 +1,234 @@
+"""Checks the head-pose sign convention in services.gaze_features.
+
+head_pose() reads yaw/pitch from FaceLandmarker's facial transformation
+matrix as arcsin(R[0,2]) / arcsin(-R[1,2]). If either sign disagrees
+with what MediaPipe outputs, head compensation adds head motion instead
+of cancelling it. Two checks:
+
+  canonical  (default) uses the canonical face mesh bundled in
+             face_landmarker.task. The mesh is turned by known yaw/pitch
+             and projected to MediaPipe-style normalised landmarks. The
+             matrix is then recovered from those landmarks by weighted
+             Procrustes, as MediaPipe's geometry pipeline does. Checks
+             that the matrix path, the landmark (nose-tip) path and
+             synthetic_face.head_matrix all agree in sign, with and
+             without the selfie mirror.
+  recording  --recording session.npz with arrays `landmarks` (T, 478, 3)
+             and `matrices` (T, 4, 4) from a real camera session
+             (--record writes one). Checks that the matrix and landmark
+             estimates correlate positively over the session.
+
+    python -m bench.head_pose_convention
+    python -m bench.head_pose_convention --record session.npz [--seconds 30]
+    python -m bench.head_pose_convention --recording session.npz
+"""
+import argparse
+import time
+import zipfile
+
+import numpy as np
+
+from services import gaze_features
+from services.model_loader import MODEL_PATH
+from services.synthetic_face import NUM_LANDMARKS, head_matrix
+
+GEOMETRY_METADATA = "geometry_pipeline_metadata_landmarks.binarypb"
+FACE_SCALE = 0.12 / 8.9  # normalised units per cm: ~12% of frame across the eyes
+
+
+# -------------------------
+# Canonical face (GeometryPipelineMetadata protobuf, read without protoc)
+# -------------------------
+def _varint(buf, i):
+    out = shift = 0
+    while True:
+        b = buf[i]
+        i += 1
+        out |= (b & 0x7F) << shift
+        shift += 7
+        if b < 0x80:
+            return out, i
+
+
+def _fields(buf):
+    i = 0
+    while i < len(buf):
+        key, i = _varint(buf, i)
+        field, wire = key >> 3, key & 7
+        if wire == 0:
+            value, i = _varint(buf, i)
+        elif wire == 1:
+            value, i = buf[i:i + 8], i + 8
+        elif wire == 2:
+            n, i = _varint(buf, i)
+            value, i = buf[i:i + n], i + n
+        elif wire == 5:
+            value, i = buf[i:i + 4], i + 4
+        else:
+            raise ValueError(f"unsupported wire type {wire}")
+        yield field, wire, value
+
+
+def load_canonical_face(path=MODEL_PATH):
+    """(468, 3) canonical mesh in cm (x image-right, y up, z toward the camera) and Procrustes weights."""
+    with zipfile.ZipFile(path) as z:
+        buf = z.read(GEOMETRY_METADATA)
+    vertices, weights = [], np.zeros(468)
+    for field, _, value in _fields(buf):
+        if field == 1:  # canonical_mesh
+            for f, wire, v in _fields(value):
+                if f == 3:  # vertex_buffer: x, y, z, u, v per vertex
+                    vertices.append(np.frombuffer(v, "<f4") if wire == 2 else np.frombuffer(v, "<f4")[:1])
+        elif field == 2:  # procrustes_landmark_basis
+            ref = {f: v for f, _, v in _fields(value)}
+            weights[ref.get(1, 0)] = np.frombuffer(ref[2], "<f4")[0]
+    mesh = np.concatenate(vertices).reshape(-1, 5)[:, :3].astype(np.float64)
+    return mesh, weights
+
+
+def rotation(yaw, pitch):
+    """Camera-space rotation (x right, y up, z toward camera): face turns image-right/down."""
+    cy, sy = np.cos(yaw), np.sin(yaw)
+    cp, sp = np.cos(pitch), np.sin(pitch)
+    ry = np.array([[cy, 0, sy], [0, 1, 0], [-sy, 0, cy]])
+    rx = np.array([[1, 0, 0], [0, cp, -sp], [0, sp, cp]])
+    return ry @ rx
+
+
+def project(mesh, rot):
+    """MediaPipe-style landmarks: x right, y down (0..1), z smaller = closer."""
+    cam = mesh @ rot.T
+    lm = np.zeros((NUM_LANDMARKS, 3))
+    lm[:468, 0] = 0.5 + cam[:, 0] * FACE_SCALE
+    lm[:468, 1] = 0.5 - cam[:, 1] * FACE_SCALE
+    lm[:468, 2] = -cam[:, 2] * FACE_SCALE
+    # No iris in the canonical mesh: put both irises at their eye's centre
+    for iris, corners in ((gaze_features.LEFT_IRIS_IDX, (33, 133)), (gaze_features.RIGHT_IRIS_IDX, (362, 263))):
+        lm[list(iris)] = lm[list(corners)].mean(axis=0)
+    return lm
+
+
+def procrustes(mesh, weights, lm):
+    """Rotation of the canonical mesh onto metric landmarks (weighted, with scale)."""
+    metric = np.stack([lm[:468, 0] - 0.5, 0.5 - lm[:468, 1], -lm[:468, 2]], axis=1)
+    w = weights / weights.sum()
+    src = mesh - w @ mesh
+    dst = metric - w @ metric
+    u, _, vt = np.linalg.svd((dst * w[:, None]).T @ src)
+    d = np.sign(np.linalg.det(u @ vt))
+    return u @ np.diag([1.0, 1.0, d]) @ vt
+
+
+def head_poses(mesh, weights, yaw, pitch):
+    """(matrix, landmarks, mirrored matrix, mirrored landmarks) head_pose() estimates."""
+    lm = project(mesh, rotation(yaw, pitch))
+    mat = np.eye(4)
+    mat[:3, :3] = procrustes(mesh, weights, lm)
+    pts = gaze_features.gather_points(lm)
+    # Served path: landmarks of the raw camera frame, mirrored into the selfie view
+    pts_m = gaze_features.gather_points(lm, mirror=True)
+    est = (
+        gaze_features.head_pose(pts, mat),
+        gaze_features.head_pose(pts),
+        gaze_features.head_pose(pts_m, mat, mirror=True),
+        gaze_features.head_pose(pts_m, mirror=True),
+    )
+    return np.array(est), mat
+
+
+def canonical_check():
+    mesh, weights = load_canonical_face()
+    print(f"canonical mesh {mesh.shape[0]} vertices, {int((weights > 0).sum())} Procrustes landmarks")
+    print("head_pose() change from a still head (yaw, pitch); each moved axis must keep its sign")
+    print(f"{'yaw':>6} {'pitch':>6}   {'matrix':>15} {'landmarks':>15}   {'mirror matrix':>15} {'mirror lmk':>15}")
+    # The nose-tip estimate has a constant offset (calibration absorbs it), so
+    # compare changes from the neutral pose
+    neutral, _ = head_poses(mesh, weights, 0.0, 0.0)
+    ok = True
+    for yaw in (-0.3, -0.1, 0.0, 0.1, 0.3):
+        for pitch in (-0.2, 0.0, 0.2):
+            if not (yaw or pitch):
+                continue
+            est, mat = head_poses(mesh, weights, yaw, pitch)
+            delta = est - neutral
+            recovered = np.abs(mat[:3, :3] - rotation(yaw, pitch)).max() < 1e-6
+            synthetic = np.abs(head_matrix(yaw, pitch)[:3, :3] - mat[:3, :3]).max() < 1e-6
+            # Mirrored (selfie view): a face turned toward raw-image-right turns toward view-left
+            expect = np.sign([[yaw, pitch], [yaw, pitch], [-yaw, pitch], [-yaw, pitch]])
+            # An axis that didn't move may still pick up a little cross-talk
+            moved = expect != 0
+            agree = bool(np.all(np.sign(delta[moved]) == expect[moved])) and recovered and synthetic
+            ok &= agree
+            cols = "  ".join(f"{d[0]:+.3f},{d[1]:+.3f}" for d in delta)
+            note = "" if agree else "   <-- MISMATCH" + ("" if recovered else " (matrix)") + \
+                ("" if synthetic else " (synthetic_face.head_matrix)")
+            print(f"{yaw:+6.2f} {pitch:+6.2f}   {cols}{note}")
+    print("PASS: matrix, landmark and synthetic conventions agree" if ok else "FAIL: sign convention mismatch")
+    return ok
+
+
+# -------------------------
+# Recorded session
+# -------------------------
+def record(path, seconds, camera):
+    import cv2
+    import mediapipe as mp
+    options = mp.tasks.vision.FaceLandmarkerOptions(
+        base_options=mp.tasks.BaseOptions(model_asset_path=MODEL_PATH),
+        running_mode=mp.tasks.vision.RunningMode.VIDEO,
+        output_facial_transformation_matrixes=True,
+    )
+    cap = cv2.VideoCapture(camera)
+    landmarks, matrices = [], []
+    print(f"Recording {seconds:.0f} s: look at the screen and turn/tilt your head")
+    with mp.tasks.vision.FaceLandmarker.create_from_options(options) as detector:
+        t0 = time.monotonic()
+        while time.monotonic() - t0 < seconds:
+            ok, frame = cap.read()
+            if not ok:
+                break
+            image = mp.Image(image_format=mp.ImageFormat.SRGB, data=cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+            result = detector.detect_for_video(image, int((time.monotonic() - t0) * 1000))
+            if result.face_landmarks and result.facial_transformation_matrixes:
+                landmarks.append([(p.x, p.y, p.z) for p in result.face_landmarks[0]])
+                matrices.append(result.facial_transformation_matrixes[0])
+    cap.release()
+    np.savez_compressed(path, landmarks=np.asarray(landmarks), matrices=np.asarray(matrices))
+    print(f"Saved {len(landmarks)} frames to {path}")
+
+
+def recording_check(path):
+    data = np.load(path)
+    est = []
+    for lm, mat in zip(data["landmarks"], data["matrices"]):
+        pts = gaze_features.gather_points(lm)
+        est.append(gaze_features.head_pose(pts, mat) + gaze_features.head_pose(pts))
+    est = np.asarray(est)
+    ok = True
+    for axis, name in ((0, "yaw"), (1, "pitch")):
+        m, l = est[:, axis], est[:, axis + 2]
+        corr = np.corrcoef(m, l)[0, 1]
+        ok &= corr > 0
+        print(f"{name:<6} matrix std {m.std():.4f}   landmarks std {l.std():.4f}   correlation {corr:+.3f}")
+    print(f"{len(est)} frames: " + ("PASS: matrix and landmark head pose agree in sign" if ok
+                                     else "FAIL: matrix and landmark head pose disagree"))
+    return ok
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--recording", help="npz with landmarks (T, 478, 3) and matrices (T, 4, 4)")
+    ap.add_argument("--record", help="record a camera session to this npz")
+    ap.add_argument("--seconds", type=float, default=30)
+    ap.add_argument("--camera", type=int, default=0)
+    args = ap.parse_args()
+
+    if args.record:
+        record(args.record, args.seconds, args.camera)
+        return
+    ok = recording_check(args.recording) if args.recording else canonical_check()
+    raise SystemExit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
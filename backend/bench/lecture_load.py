@@ -0,0 +1,112 @@
+"""Classroom load test: per-student question calls vs. lecture broadcast.
+
+Starts the app in-process (uvicorn, stub LLM with ~1 s latency) and plays
+a lecture of --segments segments to --students students:
+
+  per-student  every student POSTs /get-educational-questions per segment
+  broadcast    the lecturer posts the transcript once; students get the
+               questions over /lecture/{id}/ws
+
+Reports upstream model calls and p50/p95 time from segment end until a
+student has questions.
+
+    python -m bench.lecture_load [--students 30] [--segments 4]
+"""
+import argparse
+import asyncio
+import json
+import threading
+import time
+
+import httpx
+import numpy as np
+import uvicorn
+import websockets
+
+from bench import stub_llm
+
+SEGMENT = ("so today we continue with gradient descent the idea is that we follow the "
+           "negative gradient of the loss with a step size called the learning rate "
+           "if the learning rate is too large we overshoot and if it is too small "
+           "training is slow so we usually tune it on a validation set. ")
+
+
+def start_server(port):
+    import main
+    config = uvicorn.Config(main.app, port=port, log_level="warning")
+    server = uvicorn.Server(config)
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+async def per_student(base, students, segments):
+    lat = []
+    async with httpx.AsyncClient(base_url=base, timeout=300) as client:
+        async def one():
+            t0 = time.perf_counter()
+            r = await client.post("/get-educational-questions", json={"prompt": SEGMENT})
+            r.raise_for_status()
+            lat.append(time.perf_counter() - t0)
+        for _ in range(segments):
+            await asyncio.gather(*(one() for _ in range(students)))
+    return lat
+
+
+async def broadcast(base, ws_base, students, segments):
+    lat = []
+    async with httpx.AsyncClient(base_url=base, timeout=60) as client:
+        created = (await client.post("/lecture")).json()
+        lid, token = created["lecture_id"], created["token"]
+        sent_at = {}
+
+        async def student(ready):
+            async with websockets.connect(f"{ws_base}/lecture/{lid}/ws") as ws:
+                ready.set()
+                for _ in range(segments):
+                    msg = json.loads(await ws.recv())
+                    lat.append(time.perf_counter() - sent_at[msg["segment"]])
+
+        readies = [asyncio.Event() for _ in range(students)]
+        tasks = [asyncio.create_task(student(r)) for r in readies]
+        await asyncio.gather(*(r.wait() for r in readies))
+        for i in range(segments):
+            sent_at[i] = time.perf_counter()
+            await client.post(f"/lecture/{lid}/transcript", json={"text": SEGMENT, "final": True},
+                              headers={"X-Lecture-Token": token})
+            # Wait for this segment to land everywhere, like a real lecture pace
+            while sum(1 for _ in lat) < students * (i + 1):
+                await asyncio.sleep(0.01)
+        await asyncio.gather(*tasks)
+    return lat
+
+
+def report(name, lat, calls):
+    print(f"{name:<12} upstream calls {calls:5d}   p50 {np.percentile(lat, 50):6.2f} s   "
+          f"p95 {np.percentile(lat, 95):6.2f} s")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--students", type=int, default=30)
+    ap.add_argument("--segments", type=int, default=4)
+    ap.add_argument("--latency", type=float, default=1.0, help="stub model latency (s)")
+    ap.add_argument("--port", type=int, default=8790)
+    args = ap.parse_args()
+
+    stub_llm.install(args.latency, args.latency * 0.2)
+    start_server(args.port)
+    base, ws_base = f"http://127.0.0.1:{args.port}", f"ws://127.0.0.1:{args.port}"
+
+    stub_llm.calls = 0
+    lat = asyncio.run(per_student(base, args.students, args.segments))
+    report("per-student", lat, stub_llm.calls)
+
+    stub_llm.calls = 0
+    lat = asyncio.run(broadcast(base, ws_base, args.students, args.segments))
+    report("broadcast", lat, stub_llm.calls)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Live (debounced, streaming) question generation vs. one call after speech ends.
+
+Plays simulated utterances against the app in-process (uvicorn, stub LLM).
+Words arrive at --wps with interim hypotheses whose tail gets revised, and
+finals every few words, as browser speech recognition does:
+
+  on-stop   POST /get-educational-questions with the final transcript
+  live      stream deltas over /questions/live, send done at the end
+
+The student presses stop --pause seconds after the last word. Reports
+time from stop until questions for the full transcript are on screen,
+time from the start of speech until the first (partial) set, and upstream
+calls.
+
+    python -m bench.live_questions [--utterances 10] [--seconds 8] [--pause 1]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+
+import httpx
+import numpy as np
+import websockets
+
+os.environ.setdefault("GAZE_ENABLED", "0")
+
+from bench import stub_llm  # noqa: E402
+from bench.lecture_load import SEGMENT, start_server  # noqa: E402
+
+WORDS = SEGMENT.split()
+FINAL_EVERY = 8
+INTERIM_PERIOD_S = 0.15
+
+
+async def speak(send, seconds, wps):
+    """Emits (final, interim) deltas for `seconds` of speech; returns the full text."""
+    n_words = int(seconds * wps)
+    said, finalised = [], 0
+    t0 = time.perf_counter()
+    while len(said) < n_words:
+        await asyncio.sleep(INTERIM_PERIOD_S)
+        due = min(n_words, int((time.perf_counter() - t0) * wps))
+        while len(said) < due:
+            said.append(WORDS[len(said) % len(WORDS)])
+        if len(said) - finalised >= FINAL_EVERY:
+            await send(" ".join(said[finalised:]), "")
+            finalised = len(said)
+        else:
+            # The recogniser keeps rewriting the last word or two
+            tail = said[finalised:]
+            if tail and random.random() < 0.4:
+                tail = tail[:-1] + [tail[-1][::-1]]
+            await send("", " ".join(tail))
+    await send(" ".join(said[finalised:]), "")
+    return " ".join(said)
+
+
+async def on_stop(base, seconds, wps, pause):
+    async with httpx.AsyncClient(base_url=base, timeout=60) as client:
+        async def send(final, interim):
+            pass
+        text = await speak(send, seconds, wps)
+        await asyncio.sleep(pause)
+        t_stop = time.perf_counter()
+        r = await client.post("/get-educational-questions", json={"prompt": text})
+        r.raise_for_status()
+        done = time.perf_counter() - t_stop
+    return {"after_stop": done, "first": seconds + pause + done}
+
+
+async def live(ws_base, seconds, wps, pause):
+    async with websockets.connect(f"{ws_base}/questions/live") as ws:
+        first = []
+        t_start = time.perf_counter()
+
+        async def recv():
+            while True:
+                msg = json.loads(await ws.recv())
+                if msg["type"] == "questions":
+                    first.append(time.perf_counter() - t_start)
+                    if msg["final"]:
+                        return time.perf_counter()
+
+        receiver = asyncio.create_task(recv())
+
+        async def send(final, interim):
+            await ws.send(json.dumps({"final": final, "interim": interim}))
+
+        await speak(send, seconds, wps)
+        await asyncio.sleep(pause)
+        t_stop = time.perf_counter()
+        await ws.send(json.dumps({"done": True}))
+        t_final = await receiver
+    return {"after_stop": t_final - t_stop, "first": first[0]}
+
+
+def report(name, runs, calls):
+    after = [r["after_stop"] for r in runs]
+    first = [r["first"] for r in runs]
+    print(f"{name:<8} after stop p50 {np.percentile(after, 50):5.2f} s  p95 {np.percentile(after, 95):5.2f} s   "
+          f"first set at {np.median(first):5.2f} s   upstream calls/utterance {calls / len(runs):4.1f}")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--utterances", type=int, default=10)
+    ap.add_argument("--seconds", type=float, default=8.0, help="speech length per utterance")
+    ap.add_argument("--wps", type=float, default=2.5, help="spoken words per second")
+    ap.add_argument("--pause", type=float, default=1.0, help="silence before pressing stop (s)")
+    ap.add_argument("--latency", type=float, default=1.5, help="stub model latency (s)")
+    ap.add_argument("--port", type=int, default=8791)
+    args = ap.parse_args()
+
+    stub_llm.install(args.latency, args.latency * 0.2)
+    start_server(args.port)
+    base, ws_base = f"http://127.0.0.1:{args.port}", f"ws://127.0.0.1:{args.port}"
+
+    for name, run in (("on-stop", lambda: on_stop(base, args.seconds, args.wps, args.pause)),
+                      ("live", lambda: live(ws_base, args.seconds, args.wps, args.pause))):
+        stub_llm.calls = 0
+        runs = [asyncio.run(run()) for _ in range(args.utterances)]
+        report(name, runs, stub_llm.calls)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""Model-call admission control under a provider rate limit.
+
+Starts the app in-process with a rate-limited stub model (429 +
+Retry-After once over --provider-tpm) and sends a classroom burst:
+--students students arrive within --arrival seconds. Each one asks for an
+explanation (interactive), then follow-ups (background). Meanwhile
+--prefetch background question sets per student come from live sessions.
+
+  direct     scheduler effectively off: no cap, no budget, no retries
+             (what the routes did before)
+  scheduled  default scheduler, budget set just under the provider limit
+  overbudget budget 1.5x the provider limit: exercises 429 backoff/retry
+
+Reports success and p50/p95 latency per call type, 429s seen by the
+provider stub, and scheduler rejections.
+
+    python -m bench.llm_admission [--students 40] [--provider-tpm 120000]
+"""
+import argparse
+import asyncio
+import os
+import random
+import time
+
+import httpx
+import numpy as np
+from fastapi import HTTPException
+
+os.environ.setdefault("GAZE_ENABLED", "0")
+
+from bench import stub_llm  # noqa: E402
+from bench.lecture_load import SEGMENT, start_server  # noqa: E402
+from services import llm_scheduler, metrics  # noqa: E402
+
+FALLBACK_FOLLOWUPS = ["Can you give an example?", "How do I apply this?"]
+
+
+async def student(client, arrival, prefetch, results):
+    await asyncio.sleep(random.uniform(0, arrival))
+
+    async def timed(kind, path, body):
+        t0 = time.perf_counter()
+        r = await client.post(path, json=body)
+        ok = r.status_code == 200
+        if ok and kind == "followups" and r.json()["followups"] == FALLBACK_FOLLOWUPS:
+            ok = False  # shed: generic fallback served instead
+        results.append((kind, ok, time.perf_counter() - t0))
+        return r
+
+    async def background():
+        for _ in range(prefetch):
+            await timed("prefetch", "/get-educational-questions/_bench_prefetch", {"prompt": SEGMENT})
+
+    bg = asyncio.create_task(background())
+    r = await timed("explanation", "/get-educational-explanation",
+                    {"prompt": SEGMENT, "question": "Why does a large learning rate overshoot?"})
+    if r.status_code == 200:
+        await timed("followups", "/get-followup-questions",
+                    {"prompt": SEGMENT, "question": "Why?", "explanation": r.json()["explanation"]})
+    await bg
+
+
+def install_prefetch_route(app):
+    """Background question sets, like /questions/live makes mid-speech."""
+    from routers.openai_routes import generate_questions, overloaded
+
+    @app.post("/get-educational-questions/_bench_prefetch")
+    async def prefetch(body: dict):
+        try:
+            return {"questions": await generate_questions(
+                body["prompt"], priority=llm_scheduler.BACKGROUND, timeout_s=10.0)}
+        except llm_scheduler.Rejected as e:
+            raise overloaded(e)
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+
+def rejected_counts():
+    return {"/".join(key): int(child.value) for key, child in metrics.LLM_REJECTED._children.items()}
+
+
+def report(name, results, wall):
+    print(f"\n{name}  ({wall:.1f} s wall, provider 429s {stub_llm.rate_limited}, "
+          f"retries {int(metrics.LLM_RETRIES._default.value)}, upstream calls {stub_llm.calls}, "
+          f"scheduler rejections {rejected_counts()})")
+    for kind in ("explanation", "followups", "prefetch"):
+        rows = [(ok, t) for k, ok, t in results if k == kind]
+        if not rows:
+            continue
+        ok_t = [t for ok, t in rows if ok]
+        p50 = f"{np.percentile(ok_t, 50):5.2f}" if ok_t else "  n/a"
+        p95 = f"{np.percentile(ok_t, 95):5.2f}" if ok_t else "  n/a"
+        print(f"  {kind:<12} ok {len(ok_t):3d}/{len(rows):3d}   p50 {p50} s   p95 {p95} s")
+
+
+async def run(base, args):
+    results = []
+    async with httpx.AsyncClient(base_url=base, timeout=120,
+                                 limits=httpx.Limits(max_connections=1000)) as client:
+        t0 = time.perf_counter()
+        await asyncio.gather(*(student(client, args.arrival, args.prefetch, results)
+                               for _ in range(args.students)))
+    return results, time.perf_counter() - t0
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--students", type=int, default=40)
+    ap.add_argument("--arrival", type=float, default=3.0, help="students arrive within this many seconds")
+    ap.add_argument("--prefetch", type=int, default=2, help="background question sets per student")
+    ap.add_argument("--provider-tpm", type=float, default=120000,
+                    help="stub provider rate limit (tokens/min); the scheduler budget is set from it")
+    ap.add_argument("--latency", type=float, default=1.0, help="stub model latency (s)")
+    ap.add_argument("--port", type=int, default=8792)
+    args = ap.parse_args()
+
+    import main as app_main
+    install_prefetch_route(app_main.app)
+    start_server(args.port)
+    base = f"http://127.0.0.1:{args.port}"
+
+    configs = (
+        ("direct", dict(max_concurrency=1000, tokens_per_min=1e12), 0),
+        ("scheduled", dict(tokens_per_min=args.provider_tpm * 0.95), llm_scheduler.MAX_RETRIES),
+        ("overbudget", dict(tokens_per_min=args.provider_tpm * 1.5), llm_scheduler.MAX_RETRIES),
+    )
+    for name, kw, retries in configs:
+        stub_llm.install(args.latency, args.latency * 0.2, tokens_per_min=args.provider_tpm)
+        llm_scheduler.scheduler.__init__(**kw)
+        llm_scheduler.MAX_RETRIES = retries
+        metrics.LLM_REJECTED._children.clear()
+        metrics.LLM_RETRIES._default.value = 0
+        results, wall = asyncio.run(run(base, args))
+        report(name, results, wall)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Per-frame cost of the gaze-loop instrumentation.
+
+Makes the instrumentation calls run_source/process_result make on one
+camera frame: the read-wait observation, the per-frame stage dict via
+gaze_tracker._stage, the submit-time bookkeeping and the inference
+observation in result_callback,
+counters, and slow_frames.record. Checks the total against FRAME_BUDGET_US.
+
+A frame only takes the slow-frame heap's lock when it is slower than the
+current N slowest; the worst case (every frame enters the log) is
+reported separately.
+
+    python -m bench.metrics_overhead [--frames 200000]
+"""
+import argparse
+import itertools
+import time
+
+from services import metrics
+from services.gaze_tracker import MAX_SUBMITTED, _stage, _submitted, result_callback
+from services.profiler import SlowFrameLog, slow_frames
+
+FRAME_BUDGET_US = 10.0
+_timestamps = itertools.count()
+
+
+def one_frame(log=slow_frames):
+    t0 = metrics.observe_since(metrics.READ_WAIT_SECONDS, time.perf_counter())
+    metrics.FRAMES_TOTAL.inc()
+    stages = {}
+    t0 = _stage(stages, "capture", metrics.STAGE_CAPTURE, t0)
+    ts = next(_timestamps)
+    if len(_submitted) >= MAX_SUBMITTED:
+        _submitted.clear()
+    _submitted[ts] = t0
+    _stage(stages, "submit", metrics.STAGE_SUBMIT, t0)
+    result_callback(None, None, ts)  # on MediaPipe's thread in the real loop
+    metrics.RESULT_REUSED.inc()
+    t0 = time.perf_counter()
+    t0 = _stage(stages, "features", metrics.STAGE_FEATURES, t0)
+    _stage(stages, "mapping", metrics.STAGE_MAPPING, t0)
+    log.record(stages)
+
+
+class _AlwaysSlower(SlowFrameLog):
+    """Every frame beats the current slowest: a heap replace on every record."""
+
+    def record(self, stages, ts_ms=None):
+        self._n = getattr(self, "_n", 0) + 1
+        stages["capture"] += self._n
+        super().record(stages, ts_ms)
+
+
+def per_frame_us(frames, log=slow_frames):
+    t0 = time.perf_counter()
+    for _ in range(frames):
+        one_frame(log)
+    return (time.perf_counter() - t0) / frames * 1e6
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--frames", type=int, default=200_000)
+    args = ap.parse_args()
+
+    per_frame = per_frame_us(args.frames)
+    worst = per_frame_us(args.frames, _AlwaysSlower())
+
+    t0 = time.perf_counter()
+    text = metrics.render_latest()
+    render_ms = (time.perf_counter() - t0) * 1e3
+
+    status = "OK" if per_frame <= FRAME_BUDGET_US else "OVER BUDGET"
+    print(f"instrumentation: {per_frame:.2f} us/frame (budget {FRAME_BUDGET_US} us) {status}")
+    print(f"  every frame entering the slow-frame log: {worst:.2f} us/frame")
+    print(f"/metrics render: {render_ms:.2f} ms, {len(text)} bytes")
+    if per_frame > FRAME_BUDGET_US:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Per-frame preprocessing cost: old flip path vs. reused RGB buffers.
+
+  before          cv2.flip(frame, 1)                (BGR handed over as SRGB)
+  before+convert  cv2.flip + cv2.cvtColor           (what a correct old path would cost)
+  after           FramePreprocessor (cvtColor into reused buffers, mirror on landmarks)
+
+Allocations are measured as peak new bytes per frame with tracemalloc
+(NumPy reports its buffers to it), also expressed in frame-sized buffers.
+
+    python -m bench.preprocess_frames [--frames 500] [--mp-image]
+"""
+import argparse
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+from services.preprocess import FramePreprocessor
+
+SIZES = ((640, 480), (1280, 720))
+
+
+def time_per_frame(fn, frame, n, wrap):
+    for _ in range(10):
+        wrap(fn(frame))
+    t0 = time.perf_counter()
+    for _ in range(n):
+        wrap(fn(frame))
+    return (time.perf_counter() - t0) / n * 1e6
+
+
+def alloc_per_frame(fn, frame, n, wrap):
+    """Peak newly allocated bytes per frame, and that in frame-sized buffers."""
+    tracemalloc.start()
+    peak = 0
+    for _ in range(n):
+        base = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        out = wrap(fn(frame))
+        peak += tracemalloc.get_traced_memory()[1] - base
+        del out
+    tracemalloc.stop()
+    peak /= n
+    return peak / frame.nbytes, peak
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--frames", type=int, default=500)
+    ap.add_argument("--mp-image", action="store_true", help="include mp.Image construction")
+    args = ap.parse_args()
+
+    wrap = lambda img: img
+    if args.mp_image:
+        import mediapipe as mp
+        wrap = lambda img: mp.Image(image_format=mp.ImageFormat.SRGB, data=img)
+
+    for w, h in SIZES:
+        frame = np.random.default_rng(0).integers(0, 255, (h, w, 3), dtype=np.uint8)
+        pre = FramePreprocessor()
+        paths = (
+            ("before", lambda f: cv2.flip(f, 1)),
+            ("before+convert", lambda f: cv2.cvtColor(cv2.flip(f, 1), cv2.COLOR_BGR2RGB)),
+            ("after", pre),
+        )
+        print(f"{w}x{h}")
+        for name, fn in paths:
+            per_frame_us = time_per_frame(fn, frame, args.frames, wrap)
+            buffers, nbytes = alloc_per_frame(fn, frame, min(args.frames, 100), wrap)
+            print(f"  {name:<15} {per_frame_us:8.1f} us/frame   "
+                  f"{buffers:4.1f} frame buffers/frame   {nbytes / 1024:8.1f} KiB/frame")
+
+
+if __name__ == "__main__":
+    main()
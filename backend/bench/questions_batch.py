@@ -0,0 +1,81 @@
+"""Question pre-generation throughput: sequential calls vs. the batch endpoint.
+
+Starts the app in-process (stub LLM) and generates questions for
+--segments transcript chunks:
+
+  sequential  one POST /get-educational-questions per segment, in order
+  batch       one POST /get-educational-questions/batch, NDJSON streamed back
+
+Both go through the model-call scheduler with its default budget.
+Reports segments/sec and the time until the first batch result arrives.
+
+    python -m bench.questions_batch [--segments 200] [--concurrency 8]
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+import httpx
+
+os.environ.setdefault("GAZE_ENABLED", "0")
+
+from bench import stub_llm  # noqa: E402
+from bench.lecture_load import SEGMENT, start_server  # noqa: E402
+
+
+def segments(n):
+    return [f"part {i}: {SEGMENT}" for i in range(n)]
+
+
+async def sequential(base, segs):
+    async with httpx.AsyncClient(base_url=base, timeout=120) as client:
+        t0 = time.perf_counter()
+        for seg in segs:
+            r = await client.post("/get-educational-questions", json={"prompt": seg})
+            r.raise_for_status()
+        return time.perf_counter() - t0, None, len(segs)
+
+
+async def batch(base, segs, concurrency):
+    async with httpx.AsyncClient(base_url=base, timeout=600) as client:
+        t0 = time.perf_counter()
+        first, ok = None, 0
+        body = {"segments": segs, "concurrency": concurrency}
+        async with client.stream("POST", "/get-educational-questions/batch", json=body) as r:
+            r.raise_for_status()
+            async for line in r.aiter_lines():
+                if not line:
+                    continue
+                if first is None:
+                    first = time.perf_counter() - t0
+                ok += "questions" in json.loads(line)
+        return time.perf_counter() - t0, first, ok
+
+
+def report(name, n, result):
+    wall, first, ok = result
+    extra = f"   first result after {first:.2f} s" if first is not None else ""
+    print(f"{name:<11} {ok}/{n} ok in {wall:6.1f} s   {n / wall:6.2f} segments/s{extra}")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--segments", type=int, default=200)
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--latency", type=float, default=1.0, help="stub model latency (s)")
+    ap.add_argument("--port", type=int, default=8793)
+    args = ap.parse_args()
+
+    stub_llm.install(args.latency, args.latency * 0.2)
+    start_server(args.port)
+    base = f"http://127.0.0.1:{args.port}"
+    segs = segments(args.segments)
+
+    report("sequential", args.segments, asyncio.run(sequential(base, segs)))
+    report("batch", args.segments, asyncio.run(batch(base, segs, args.concurrency)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Gaze snapshot contention: lock + dict copy vs. atomic snapshot swap.
+
+A writer thread publishes at 60 Hz (like gaze_loop) while N reader
+coroutines on one event loop read as fast as they can (worst case for
+the WS handlers, which normally read at 30 Hz each).
+
+Reports reader throughput, reader latency p99, and writer publish p99.
+
+    python -m bench.snapshot_contention [--readers 200] [--seconds 3]
+"""
+import argparse
+import asyncio
+import threading
+import time
+
+import numpy as np
+
+from services import gaze_tracker
+
+
+class LockedDict:
+    """The previous implementation: one lock, mutable dict, copy per read."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.state = {"x": 0.5, "y": 0.5, "calibrated": False, "blink": False, "ts_ms": 0}
+
+    def publish(self, x, y):
+        with self.lock:
+            self.state["x"] = x
+            self.state["y"] = y
+            self.state["blink"] = False
+            self.state["calibrated"] = True
+            self.state["ts_ms"] = int(time.time() * 1000)
+
+    def read(self):
+        with self.lock:
+            return dict(self.state)
+
+
+class Snapshot:
+    def publish(self, x, y):
+        gaze_tracker.publish_gaze(x=x, y=y, blink=False, calibrated=True, ts_ms=int(time.time() * 1000))
+
+    def read(self):
+        return gaze_tracker.get_gaze_snapshot()
+
+
+def writer(impl, stop, lat):
+    period = 1 / 60
+    nxt = time.perf_counter()
+    i = 0
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        impl.publish(0.5 + 0.001 * (i % 100), 0.5)
+        lat.append(time.perf_counter() - t0)
+        i += 1
+        nxt += period
+        time.sleep(max(0.0, nxt - time.perf_counter()))
+
+
+async def reader(impl, deadline, lat, counts):
+    n = 0
+    sample = lat.append
+    while time.perf_counter() < deadline:
+        for _ in range(100):
+            t0 = time.perf_counter()
+            impl.read()
+            sample(time.perf_counter() - t0)
+        n += 100
+        await asyncio.sleep(0)
+    counts.append(n)
+
+
+def run(name, impl, readers, seconds):
+    stop = threading.Event()
+    wlat, rlat, counts = [], [], []
+    t = threading.Thread(target=writer, args=(impl, stop, wlat), daemon=True)
+    t.start()
+
+    async def main():
+        deadline = time.perf_counter() + seconds
+        await asyncio.gather(*(reader(impl, deadline, rlat, counts) for _ in range(readers)))
+
+    asyncio.run(main())
+    stop.set()
+    t.join()
+    print(f"{name:<16} reads/s {sum(counts) / seconds:12,.0f}   "
+          f"read p99 {np.percentile(rlat, 99) * 1e6:6.2f} us   "
+          f"publish p99 {np.percentile(wlat, 99) * 1e6:7.2f} us   ({len(wlat)} publishes)")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--readers", type=int, default=200)
+    ap.add_argument("--seconds", type=float, default=3.0)
+    args = ap.parse_args()
+    run("lock + dict", LockedDict(), args.readers, args.seconds)
+    run("snapshot swap", Snapshot(), args.readers, args.seconds)
+
+
+if __name__ == "__main__":
+    main()
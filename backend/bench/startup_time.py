@@ -0,0 +1,91 @@
+"""Cold-start timing for the backend.
+
+Spawns `uvicorn main:app` and polls /health to report:
+  - import time of `main` (separate interpreter)
+  - time to first successful request
+  - time until the gaze model is ready, and until the first gaze sample
+    (first tracked face; no calibration needed)
+
+The model only loads for frame sources (camera, file, push frames), and a
+first sample needs a face in front of one. Without a camera, run with
+`--source synthetic` for the sample: it feeds landmarks, so no model loads.
+
+    python -m bench.startup_time [--port 8765] [--timeout 60] [--no-gaze] [--source synthetic]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def import_time_ms(env) -> float:
+    code = "import time; t=time.perf_counter(); import main; print((time.perf_counter()-t)*1000)"
+    out = subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, env=env,
+                         capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def poll_health(port: int):
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=0.5) as r:
+            return json.loads(r.read())
+    except OSError:
+        return None
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--timeout", type=float, default=60.0)
+    ap.add_argument("--no-gaze", action="store_true", help="start with GAZE_ENABLED=0")
+    ap.add_argument("--source", help="GAZE_SOURCE for the server (default: its own default)")
+    args = ap.parse_args()
+
+    env = dict(os.environ)
+    if args.no_gaze:
+        env["GAZE_ENABLED"] = "0"
+    if args.source:
+        env["GAZE_SOURCE"] = args.source
+
+    print(f"import main:            {import_time_ms(env):8.1f} ms")
+
+    t0 = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env,
+    )
+    marks = {}
+    try:
+        while time.perf_counter() - t0 < args.timeout:
+            health = poll_health(args.port)
+            now = (time.perf_counter() - t0) * 1000
+            if health is not None:
+                marks.setdefault("first request", now)
+                gaze = health.get("gaze", {})
+                if not gaze.get("enabled", True):
+                    break
+                if gaze.get("state") == "ready":
+                    marks.setdefault("gaze model ready", now)
+                if gaze.get("state") == "error":
+                    print(f"gaze model error: {gaze.get('error')}")
+                    break
+                if gaze.get("first_sample_ms") is not None:
+                    marks.setdefault("first gaze sample", now)
+                    break
+            time.sleep(0.01)
+    finally:
+        proc.terminate()
+        proc.wait()
+
+    for name in ("first request", "gaze model ready", "first gaze sample"):
+        val = marks.get(name)
+        print(f"{name + ':':<24}{'%8.1f ms' % val if val is not None else '     n/a'}")
+
+
+if __name__ == "__main__":
+    main()
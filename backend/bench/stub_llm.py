@@ -0,0 +1,116 @@
+"""In-process stand-in for the OpenAI client used by load tests.
+
+`install()` replaces openai.ChatCompletion.create with a fake that sleeps
+for a sampled latency and returns plausible text, and counts calls. With
+`tokens_per_min` it also enforces a provider-style rate limit: each call
+costs prompt chars / 4 + max_tokens against a bucket holding 10 s of
+budget, and a call over budget fails at once with a 429 RateLimitError
+carrying Retry-After, like the real API.
+
+`serve()` (or `python -m bench.stub_llm`) exposes the same fake as an
+OpenAI-compatible HTTP server, for a backend running in another process:
+start it with OPENAI_API_BASE=http://127.0.0.1:<port>/v1.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import openai
+
+calls = 0
+rate_limited = 0
+_lock = threading.Lock()
+
+
+class _Limiter:
+    def __init__(self, per_min, burst_s=10.0):
+        self.rate = per_min / 60.0
+        self.capacity = self.rate * burst_s
+        self.tokens = self.capacity
+        self._t = time.monotonic()
+
+    def take(self, n):
+        """Returns 0 if admitted, else seconds until `n` tokens would be available."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._t) * self.rate)
+        self._t = now
+        if self.tokens >= n:
+            self.tokens -= n
+            return 0.0
+        return (n - self.tokens) / self.rate
+
+
+def _fake_create(latency_s, jitter_s, limiter):
+    def create(model=None, messages=None, max_tokens=None, temperature=None, **kw):
+        global calls, rate_limited
+        prompt_tokens = sum(len(m["content"]) for m in messages or ()) // 4
+        with _lock:
+            calls += 1
+            wait = limiter.take(prompt_tokens + (max_tokens or 0)) if limiter else 0.0
+            if wait:
+                rate_limited += 1
+        if wait:
+            time.sleep(0.02)  # a rejection still costs a round trip
+            raise openai.error.RateLimitError(
+                "Rate limit reached (stub)", http_status=429,
+                headers={"retry-after": f"{wait:.2f}"})
+        time.sleep(max(0.0, random.gauss(latency_s, jitter_s)))
+        n = 2 if max_tokens and max_tokens <= 150 else 6
+        text = "\n".join(f"Stub question {i + 1} about the lecture?" for i in range(n))
+        return {"choices": [{"message": {"content": text}}],
+                "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": 60}}
+    return create
+
+
+def install(latency_s: float = 1.0, jitter_s: float = 0.2, tokens_per_min: float = None):
+    global calls, rate_limited
+    calls = rate_limited = 0
+    limiter = _Limiter(tokens_per_min) if tokens_per_min else None
+    openai.ChatCompletion.create = staticmethod(_fake_create(latency_s, jitter_s, limiter))
+
+
+def serve(port: int, latency_s: float = 1.0, jitter_s: float = 0.2,
+          tokens_per_min: float = None) -> ThreadingHTTPServer:
+    """Serves POST /v1/chat/completions on a daemon thread; returns the server."""
+    limiter = _Limiter(tokens_per_min) if tokens_per_min else None
+    create = _fake_create(latency_s, jitter_s, limiter)
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            try:
+                status, headers, out = 200, {}, create(**body)
+                out.update(object="chat.completion", model=body.get("model"))
+            except openai.error.RateLimitError as e:
+                status, headers = 429, {"retry-after": e.headers["retry-after"]}
+                out = {"error": {"message": str(e), "type": "rate_limit_exceeded"}}
+            data = json.dumps(out).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for k, v in headers.items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="stub_llm", daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--port", type=int, default=8799)
+    ap.add_argument("--latency", type=float, default=1.0)
+    ap.add_argument("--tokens-per-min", type=float, default=None)
+    args = ap.parse_args()
+    serve(args.port, args.latency, args.latency * 0.2, args.tokens_per_min)
+    print(f"Stub LLM on http://127.0.0.1:{args.port}/v1")
+    threading.Event().wait()
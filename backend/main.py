@@ -1,9 +1,22 @@
+import os
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response
 
+from routers.admin import router as admin_router
 from routers.gaze_ws import router as gaze_router
+from routers.lecture import router as lecture_router
+from routers.live_questions import router as live_questions_router
 from routers.openai_routes import router as openai_router
-from services.gaze_tracker import start_gaze_thread
+from services import capture, gaze_tracker, metrics, model_loader
+from services.llm_scheduler import scheduler as llm_scheduler
+
+# Set GAZE_ENABLED=0 on workers that only serve the OpenAI routes
+GAZE_ENABLED = os.getenv("GAZE_ENABLED", "1") != "0"
+# Set GAZE_SHARED=1 when running several uvicorn workers: one runs the
+# tracker, all of them serve /gaze/ws from shared memory
+GAZE_SHARED = os.getenv("GAZE_SHARED", "0") == "1"
 
 app = FastAPI()
 
@@ -17,12 +30,30 @@ app.add_middleware(
 
 @app.get("/health")
 def health():
-    return {"ok": True}
+    gaze = {"enabled": GAZE_ENABLED, **model_loader.status(), **capture.status()}
+    gaze["first_sample_ms"] = gaze_tracker.first_sample_ms
+    gaze.update(gaze_tracker.shared_status())
+    gaze.update(gaze_tracker.latency_status())
+    return {"ok": True, "gaze": gaze, "llm": llm_scheduler.status()}
+
+@app.get("/metrics")
+def metrics_endpoint():
+    return Response(metrics.render_latest(), media_type=metrics.CONTENT_TYPE)
 
 # Routers
 app.include_router(gaze_router)
 app.include_router(openai_router)
+app.include_router(lecture_router)
+app.include_router(live_questions_router)
+app.include_router(admin_router)
 
 @app.on_event("startup")
 def _startup():
-    start_gaze_thread()
+    # Returns immediately: model load + warm-up happen on the gaze thread
+    if GAZE_ENABLED:
+        gaze_tracker.start_gaze_thread(shared=GAZE_SHARED)
+
+@app.on_event("shutdown")
+def _shutdown():
+    if GAZE_ENABLED:
+        gaze_tracker.stop_gaze_thread()
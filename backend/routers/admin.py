@@ -0,0 +1,45 @@
+import os
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+
+from services.profiler import sample_profile, slow_frames
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+def _check_token(token: Optional[str]):
+    # Admin endpoints are off unless ADMIN_TOKEN is set; requests must echo it
+    # back in the X-Admin-Token header.
+    expected = os.getenv("ADMIN_TOKEN")
+    if not expected:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if token != expected:
+        raise HTTPException(status_code=403, detail="Forbidden")
+
+
+@router.get("/profile", response_class=PlainTextResponse)
+def profile(seconds: float = 5.0, hz: int = 100, idle: bool = False,
+            x_admin_token: Optional[str] = Header(None)):
+    """Collapsed stacks for all threads, e.g. `| flamegraph.pl > out.svg`."""
+    _check_token(x_admin_token)
+    # Sync handler: runs in the threadpool, so the event loop keeps serving
+    # (and shows up in the samples) while we sleep between samples.
+    try:
+        return sample_profile(seconds=seconds, hz=hz, include_idle=idle)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+@router.get("/slow-frames")
+def get_slow_frames(x_admin_token: Optional[str] = Header(None)):
+    _check_token(x_admin_token)
+    return {"size": slow_frames.size, "frames": slow_frames.top()}
+
+
+@router.post("/slow-frames/reset")
+def reset_slow_frames(x_admin_token: Optional[str] = Header(None)):
+    _check_token(x_admin_token)
+    slow_frames.clear()
+    return {"ok": True}
@@ -1,28 +1,105 @@
 import asyncio
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+import hmac
+import json
+import os
+import time
+from typing import Optional
 
+import numpy as np
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
+from pydantic import BaseModel
+
+from services import capture, metrics
 from services.gaze_tracker import (
-    get_latest_gaze_snapshot,
+    PREDICTED_FIELDS,
+    analytics_summary,
+    start_analytics_session,
+    stop_analytics_session,
+    get_gaze_snapshot,
     reset_calibration,
-    capture_calibration_point
+    runs_tracker,
+    capture_calibration_point,
+    calibration_count,
 )
 
 router = APIRouter(prefix="/gaze", tags=["gaze"])
 
 @router.websocket("/ws")
-async def gaze_ws(websocket: WebSocket):
+async def gaze_ws(websocket: WebSocket, predict: bool = False):
+    """Gaze samples; with ?predict=1 each also carries px/py (position
+    extrapolated to now) and vx/vy, see services.gaze_predict."""
     print("WS CONNECT ATTEMPT")   # add this
     await websocket.accept()
     print("WS ACCEPTED")          # add this
     interval = 1 / 30  # 30 FPS
+    keepalive = 1.0  # resend an unchanged snapshot at least this often
 
+    metrics.ACTIVE_SESSIONS.inc()
+    last_seq = -1
+    last_sent = 0.0
     try:
         while True:
-            payload = get_latest_gaze_snapshot()
-            await websocket.send_json(payload)
+            snap = get_gaze_snapshot()
+            now = time.perf_counter()
+            if snap.seq != last_seq or now - last_sent >= keepalive:
+                payload = snap._asdict()
+                if not predict:
+                    for field in PREDICTED_FIELDS:
+                        del payload[field]
+                await websocket.send_json(payload)
+                last_sent = metrics.observe_since(metrics.WS_SEND_SECONDS, now)
+                last_seq = snap.seq
             await asyncio.sleep(interval)
     except WebSocketDisconnect:
         return
+    finally:
+        metrics.ACTIVE_SESSIONS.dec()
+
+def _push_allowed(token: Optional[str]) -> bool:
+    # Pushing replaces the tracker's input for everyone: off unless
+    # GAZE_PUSH_TOKEN is set, and clients must echo it back (?token=)
+    expected = os.getenv("GAZE_PUSH_TOKEN")
+    return bool(expected) and token is not None and hmac.compare_digest(token, expected)
+
+@router.websocket("/push")
+async def gaze_push(websocket: WebSocket, kind: str = capture.FRAMES, token: Optional[str] = None):
+    """Client-pushed capture source.
+
+    kind=frames: binary messages, each an encoded image (JPEG/PNG).
+    kind=landmarks: text messages {"landmarks": [[x, y, z], ...]} (478 points).
+    The pushed stream replaces the active source until the socket closes.
+    Closes with 1013 on a worker that doesn't run the tracker (see GAZE_SHARED).
+    """
+    if kind not in (capture.FRAMES, capture.LANDMARKS) or not _push_allowed(token):
+        await websocket.close(code=1008)
+        return
+    if not runs_tracker():
+        # GAZE_SHARED follower (or GAZE_ENABLED=0): nothing here reads a
+        # capture source, so pushed frames would be silently dropped
+        await websocket.close(code=1013, reason="gaze push is only served by the tracker worker")
+        return
+    await websocket.accept()
+
+    source = capture.PushSource(kind)
+    capture.begin_push(source)
+    try:
+        while True:
+            msg = await websocket.receive()
+            if msg["type"] == "websocket.disconnect":
+                break
+            if kind == capture.FRAMES and msg.get("bytes"):
+                source.push(msg["bytes"])
+            elif kind == capture.LANDMARKS and msg.get("text"):
+                try:
+                    lm = np.asarray(json.loads(msg["text"])["landmarks"], dtype=np.float64)
+                except (ValueError, KeyError, TypeError):
+                    continue
+                if lm.ndim == 2 and lm.shape[0] >= 478 and lm.shape[1] >= 2 and np.isfinite(lm).all():
+                    source.push(lm)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        capture.end_push(source)
 
 @router.post("/calibrate/reset")
 def calibrate_reset():
@@ -33,13 +110,29 @@ def calibrate_reset():
 def calibrate_capture():
     ok = capture_calibration_point()
     # Return the current number of corners so the UI can advance
-    from services.gaze_tracker import corners
-    return {"ok": ok, "count": len(corners)}
+    return {"ok": ok, "count": calibration_count()}
 
-@router.websocket("/ws")
-async def gaze_ws(websocket: WebSocket):
-    # ...
-    payload = get_latest_gaze_snapshot()
-    # Print this to your terminal to see if x/y are changing
-    print(f"Gaze Status: Calibrated={payload['calibrated']}, X={payload['x']}, Y={payload['y']}")
-    await websocket.send_json(payload)
\ No newline at end of file
+class AnalyticsStart(BaseModel):
+    label: str = ""
+
+@router.get("/analytics")
+def get_analytics(heatmap: bool = False):
+    """Recent sessions, newest first: per-tile dwell stats and, with
+    ?heatmap=1, each session's heatmap. See services.gaze_analytics."""
+    return analytics_summary(heatmap=heatmap)
+
+@router.get("/analytics/{session_id}")
+def get_analytics_session(session_id: int):
+    session = analytics_summary(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired session")
+    return session
+
+@router.post("/analytics/start")
+def analytics_start(body: AnalyticsStart):
+    # Calibrating starts a session on its own; this splits off a labelled one
+    return {"id": start_analytics_session(body.label)}
+
+@router.post("/analytics/stop")
+def analytics_stop():
+    return {"id": stop_analytics_session()}
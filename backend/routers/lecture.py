@@ -0,0 +1,97 @@
+import asyncio
+import hmac
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException, WebSocket, WebSocketDisconnect
+from pydantic import BaseModel
+
+from routers.openai_routes import generate_questions
+from services import lectures
+
+router = APIRouter(prefix="/lecture", tags=["lecture"])
+
+
+class LectureCreated(BaseModel):
+    lecture_id: str
+    token: str  # lecturer-only; required to post transcript
+
+
+class TranscriptChunk(BaseModel):
+    text: str
+    final: bool = False  # flush whatever is buffered into a segment
+
+
+def _lecture_or_404(lecture_id: str) -> lectures.Lecture:
+    lecture = lectures.get_lecture(lecture_id)
+    if lecture is None:
+        raise HTTPException(status_code=404, detail="Unknown lecture")
+    return lecture
+
+
+def _check_lecturer(lecture: lectures.Lecture, token: Optional[str]):
+    # Bytes: compare_digest rejects non-ASCII str, and headers can carry it
+    if token is None or not hmac.compare_digest(token.encode(), lecture.token.encode()):
+        raise HTTPException(status_code=403, detail="Invalid lecture token")
+
+
+@router.post("", response_model=LectureCreated)
+async def create_lecture():
+    lecture = lectures.create_lecture(generate_questions)
+    return LectureCreated(lecture_id=lecture.id, token=lecture.token)
+
+
+@router.post("/{lecture_id}/transcript")
+async def post_transcript(lecture_id: str, chunk: TranscriptChunk,
+                          x_lecture_token: Optional[str] = Header(None)):
+    lecture = _lecture_or_404(lecture_id)
+    _check_lecturer(lecture, x_lecture_token)
+    started = lecture.add_text(chunk.text, final=chunk.final)
+    return {"ok": True, "segments_started": started, **lecture.info()}
+
+
+@router.get("/{lecture_id}")
+async def lecture_info(lecture_id: str):
+    return _lecture_or_404(lecture_id).info()
+
+
+@router.delete("/{lecture_id}")
+async def end_lecture(lecture_id: str, x_lecture_token: Optional[str] = Header(None)):
+    _check_lecturer(_lecture_or_404(lecture_id), x_lecture_token)
+    lectures.end_lecture(lecture_id)
+    return {"ok": True}
+
+
+async def _until_disconnect(websocket: WebSocket):
+    # Students never send; reading is only how a closed socket gets noticed
+    while (await websocket.receive())["type"] != "websocket.disconnect":
+        pass
+
+
+@router.websocket("/{lecture_id}/ws")
+async def lecture_ws(websocket: WebSocket, lecture_id: str):
+    """Students subscribe here; each message is one segment's questions."""
+    lecture = lectures.get_lecture(lecture_id)
+    if lecture is None:
+        await websocket.close(code=1008)
+        return
+    await websocket.accept()
+    queue = lecture.subscribe()
+    # Without it a student who left stays subscribed until the next broadcast
+    disconnected = asyncio.ensure_future(_until_disconnect(websocket))
+    try:
+        while True:
+            get = asyncio.ensure_future(queue.get())
+            await asyncio.wait({get, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+            if disconnected.done():
+                get.cancel()
+                return
+            payload = get.result()
+            await websocket.send_json(payload)
+            if payload.get("type") == "ended":
+                await websocket.close()
+                return
+    except WebSocketDisconnect:
+        return
+    finally:
+        disconnected.cancel()
+        lecture.unsubscribe(queue)
@@ -0,0 +1,45 @@
+import json
+
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+
+from routers.openai_routes import generate_questions
+from services.live_questions import LiveQuestions
+from services.llm_scheduler import BACKGROUND, INTERACTIVE
+
+router = APIRouter(prefix="/questions", tags=["questions"])
+
+
+@router.websocket("/live")
+async def live_questions_ws(websocket: WebSocket):
+    """Questions that follow the transcript while the student is talking.
+
+    Client messages: {"final": "<newly finalised text>", "interim": "<current
+    interim text>", "done": false}. Server messages: {"type": "questions",
+    "version", "prompt", "questions", "final", "ts_ms"} whenever a newer set
+    is ready, or {"type": "error", ...}.
+    """
+    await websocket.accept()
+    async def generate(prompt, final):
+        # Sets made mid-speech are prefetch; explanations go first. The set
+        # made after `done` has the student waiting on it, like the REST
+        # route; its deadline leaves the client (15 s) time to fall back.
+        if final:
+            return await generate_questions(prompt, priority=INTERACTIVE, timeout_s=12.0)
+        return await generate_questions(prompt, priority=BACKGROUND, timeout_s=10.0)
+
+    session = LiveQuestions(generate, websocket.send_json)
+    try:
+        while True:
+            try:
+                msg = json.loads(await websocket.receive_text())
+                session.feed(
+                    final=str(msg.get("final") or ""),
+                    interim=msg.get("interim"),
+                    done=bool(msg.get("done")),
+                )
+            except (ValueError, AttributeError):
+                continue
+    except WebSocketDisconnect:
+        return
+    finally:
+        session.close()
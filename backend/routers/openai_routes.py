@@ -1,16 +1,38 @@
+import asyncio
+import json
+import math
 import os
 from dotenv import load_dotenv
 from pydantic import BaseModel
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 
 import openai
 
+from services import metrics
+from services.llm_scheduler import BACKGROUND, INTERACTIVE, Rejected, estimate_tokens, scheduler
+
 load_dotenv()
 openai.api_key = os.getenv("OPENAI_API_KEY")
 
 router = APIRouter(tags=["openai"])
 
 
+async def chat_completion(route: str, priority: int, timeout_s: float, **kwargs):
+    """openai.ChatCompletion.create behind the admission scheduler."""
+    def call():
+        with metrics.OPENAI_CALL_SECONDS.labels(route).time():
+            return openai.ChatCompletion.create(**kwargs)
+    tokens = estimate_tokens(kwargs["messages"], kwargs["max_tokens"])
+    return await scheduler.run(call, priority=priority, tokens=tokens, timeout_s=timeout_s,
+                               max_tokens=kwargs["max_tokens"])
+
+
+def overloaded(e: Rejected) -> HTTPException:
+    return HTTPException(status_code=503, detail=str(e),
+                         headers={"Retry-After": str(math.ceil(e.retry_after_s))})
+
+
 # =========================
 # 1) QUESTIONS (6)
 # =========================
@@ -22,46 +44,102 @@ class ResponseBody(BaseModel):
     questions: list[str]
 
 
+QUESTIONS_SYSTEM_PROMPT = (
+    "You are an educational assistant.\n"
+    "IMPORTANT: The input text is from speech-to-text transcription and may contain wrong words, "
+    "missing punctuation, filler words, or misheard technical terms.\n"
+    "Your job: infer the student's intended meaning.\n"
+    "Rules:\n"
+    "- Ignore filler and obvious transcription errors.\n"
+    "- If a term seems wrong, silently correct to the most likely technical term.\n"
+    "- If there are multiple plausible meanings, pick the most likely one.\n"
+    "- Generate exactly 6 short, distinct, helpful questions a student might ask next.\n"
+    "- Output ONLY the 6 questions, one per line. No numbering, no bullets."
+)
+
+
+def clean_question_lines(raw_text: str, limit: int = 6) -> list[str]:
+    lines = raw_text.strip().split("\n")
+
+    # Clean up (just in case model returns bullets/numbers)
+    questions = [line.lstrip("0123456789.-) ").strip() for line in lines if line.strip()]
+    return questions[:limit]
+
+
+async def generate_questions(prompt: str, priority: int = INTERACTIVE,
+                             timeout_s: float = 20.0) -> list[str]:
+    """One model call -> up to 6 cleaned questions. Shared with lectures and live sets."""
+    response = await chat_completion(
+        "questions", priority, timeout_s,
+        model="gpt-4.1-mini",
+        messages=[
+            {"role": "system", "content": QUESTIONS_SYSTEM_PROMPT},
+            {
+                "role": "user",
+                "content": f"Speech-to-text transcript (may contain errors): {prompt}",
+            },
+        ],
+        max_tokens=500,
+        temperature=0.7,
+    )
+
+    return clean_question_lines(response["choices"][0]["message"]["content"])
+
+
 @router.post("/get-educational-questions", response_model=ResponseBody)
 async def get_educational_questions(request: RequestBody):
     try:
-        system_prompt = (
-            "You are an educational assistant.\n"
-            "IMPORTANT: The input text is from speech-to-text transcription and may contain wrong words, "
-            "missing punctuation, filler words, or misheard technical terms.\n"
-            "Your job: infer the student's intended meaning.\n"
-            "Rules:\n"
-            "- Ignore filler and obvious transcription errors.\n"
-            "- If a term seems wrong, silently correct to the most likely technical term.\n"
-            "- If there are multiple plausible meanings, pick the most likely one.\n"
-            "- Generate exactly 6 short, distinct, helpful questions a student might ask next.\n"
-            "- Output ONLY the 6 questions, one per line. No numbering, no bullets."
-        )
+        return ResponseBody(questions=await generate_questions(request.prompt))
 
-        response = openai.ChatCompletion.create(
-            model="gpt-4.1-mini",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {
-                    "role": "user",
-                    "content": f"Speech-to-text transcript (may contain errors): {request.prompt}",
-                },
-            ],
-            max_tokens=500,
-            temperature=0.7,
-        )
+    except Rejected as e:
+        raise overloaded(e)
+    except Exception as e:
+        print(f"OpenAI Error: {e}")
+        raise HTTPException(status_code=400, detail=f"Error: {str(e)}")
 
-        raw_text = response["choices"][0]["message"]["content"]
-        lines = raw_text.strip().split("\n")
 
-        # Clean up (just in case model returns bullets/numbers)
-        questions = [line.lstrip("0123456789.-) ").strip() for line in lines if line.strip()]
+# Batch: many transcript segments in one request (offline pre-generation).
+# Each segment is still one model call; they run BATCH_MAX_CONCURRENCY at a
+# time at background priority, so a big batch never starves live students.
+class BatchRequestBody(BaseModel):
+    segments: list[str]
+    concurrency: int = 4
 
-        return ResponseBody(questions=questions[:6])
 
-    except Exception as e:
-        print(f"OpenAI Error: {e}")
-        raise HTTPException(status_code=400, detail=f"Error: {str(e)}")
+BATCH_MAX_SEGMENTS = 1000
+BATCH_MAX_CONCURRENCY = 8
+
+
+@router.post("/get-educational-questions/batch")
+async def get_educational_questions_batch(request: BatchRequestBody):
+    """Streams NDJSON in completion order, one line per segment:
+    {"index", "questions"} or {"index", "error"[, "retry_after_s"]}."""
+    if len(request.segments) > BATCH_MAX_SEGMENTS:
+        raise HTTPException(status_code=413, detail=f"At most {BATCH_MAX_SEGMENTS} segments per batch")
+    limit = asyncio.Semaphore(max(1, min(request.concurrency, BATCH_MAX_CONCURRENCY)))
+
+    async def one(index: int, segment: str) -> dict:
+        async with limit:
+            try:
+                questions = await generate_questions(segment, priority=BACKGROUND, timeout_s=120.0)
+                return {"index": index, "questions": questions}
+            except Rejected as e:
+                return {"index": index, "error": str(e), "retry_after_s": e.retry_after_s}
+            except Exception as e:
+                print(f"OpenAI Error (batch segment {index}): {e}")
+                return {"index": index, "error": str(e)}
+
+    async def lines():
+        tasks = [asyncio.ensure_future(one(i, seg)) for i, seg in enumerate(request.segments)]
+        try:
+            for done in asyncio.as_completed(tasks):
+                yield json.dumps(await done) + "\n"
+        finally:
+            # Client went away: don't keep spending model calls on it
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
 
 
 # =========================
@@ -91,7 +169,9 @@ async def get_educational_explanation(request: ExplainRequestBody):
             "- Be concise but actually helpful."
         )
 
-        response = openai.ChatCompletion.create(
+        # The student just selected this question and is waiting on it
+        response = await chat_completion(
+            "explanation", INTERACTIVE, 30.0,
             model="gpt-4.1-mini",
             messages=[
                 {"role": "system", "content": system_prompt},
@@ -111,6 +191,8 @@ async def get_educational_explanation(request: ExplainRequestBody):
         text = response["choices"][0]["message"]["content"].strip()
         return ExplainResponseBody(explanation=text)
 
+    except Rejected as e:
+        raise overloaded(e)
     except Exception as e:
         print(f"OpenAI Error: {e}")
         raise HTTPException(status_code=400, detail=f"Error: {str(e)}")
@@ -153,17 +235,24 @@ async def get_followup_questions(req: FollowUpRequest):
             "Now generate 2 follow-up questions."
         )
 
-        resp = openai.ChatCompletion.create(
-            model="gpt-4.1-mini",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_content},
-            ],
-            max_tokens=120,
-            temperature=0.8,
-        )
+        try:
+            resp = await chat_completion(
+                "followups", BACKGROUND, 15.0,
+                model="gpt-4.1-mini",
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_content},
+                ],
+                max_tokens=120,
+                temperature=0.8,
+            )
+            raw = resp["choices"][0]["message"]["content"].strip()
+        except Rejected as e:
+            # Background call shed under load: the generic follow-ups below
+            # beat an error under an explanation the student already has
+            print(f"Follow-ups skipped: {e}")
+            raw = ""
 
-        raw = resp["choices"][0]["message"]["content"].strip()
         lines = [ln.strip() for ln in raw.split("\n") if ln.strip()]
         followups = [ln.lstrip("0123456789.-) ").strip() for ln in lines][:2]
 
@@ -0,0 +1,347 @@
+"""Capture sources feeding the gaze loop.
+
+A source yields either camera-style BGR frames (`kind == "frames"`, run
+through FaceLandmarker) or ready-made landmark arrays (`kind ==
+"landmarks"`, fed straight to feature extraction). The gaze loop reads
+from whichever source is active; with none active it blocks on an Event
+and uses no CPU.
+
+Sources are selected with GAZE_SOURCE:
+    camera[:index]       local webcam (default camera:0)
+    file:<path>          video file, looped
+    landmarks:<path>     recorded landmark stream (.npy/.npz, shape (T, 478, 3))
+    synthetic            generated face following a moving target
+    push                 frames/landmarks pushed by a client over /gaze/push
+    none                 start idle
+"""
+import os
+import threading
+import time
+from collections import deque
+from typing import Optional, Tuple
+
+import numpy as np
+
+FRAMES = "frames"
+LANDMARKS = "landmarks"
+
+DEFAULT_SPEC = "camera:0"
+DEFAULT_FPS = 30.0
+
+
+class CaptureSource:
+    kind = FRAMES
+    name = "source"
+
+    def open(self) -> bool:
+        return True
+
+    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        raise NotImplementedError
+
+    def interrupt(self):
+        """Wakes a blocked read() so the loop can notice a source change."""
+
+    def close(self):
+        pass
+
+    def describe(self) -> str:
+        return self.name
+
+
+class _Paced:
+    """Sleeps so that reads happen at `fps` (file/replay/synthetic sources)."""
+
+    def __init__(self, fps: float):
+        self.period = 1.0 / fps if fps > 0 else 0.0
+        self._next = 0.0
+
+    def wait(self):
+        if not self.period:
+            return
+        now = time.monotonic()
+        if self._next > now:
+            time.sleep(self._next - now)
+            now = self._next
+        self._next = max(self._next + self.period, now)
+
+
+class CameraSource(CaptureSource):
+    name = "camera"
+
+    def __init__(self, index: int = 0):
+        self.index = index
+        self._cap = None
+        self._frame = None
+
+    def open(self) -> bool:
+        import cv2
+        self._cap = cv2.VideoCapture(self.index)
+        if not self._cap.isOpened():
+            self._cap.release()
+            self._cap = None
+            return False
+        return True
+
+    def read(self):
+        if self._cap is None:
+            return False, None
+        # Decode into the previous frame's buffer; it is consumed (colour
+        # converted) before the next read.
+        ok, frame = self._cap.read(self._frame)
+        if ok:
+            self._frame = frame
+        return ok, frame
+
+    def close(self):
+        if self._cap is not None:
+            self._cap.release()
+            self._cap = None
+
+    def describe(self) -> str:
+        return f"camera:{self.index}"
+
+
+class VideoFileSource(CameraSource):
+    name = "file"
+
+    def __init__(self, path: str, loop: bool = True, fps: Optional[float] = None):
+        super().__init__()
+        self.path = path
+        self.loop = loop
+        self._fps = fps
+        self._pace = None
+
+    def open(self) -> bool:
+        import cv2
+        self._cap = cv2.VideoCapture(self.path)
+        if not self._cap.isOpened():
+            self._cap = None
+            return False
+        fps = self._fps or self._cap.get(cv2.CAP_PROP_FPS) or DEFAULT_FPS
+        self._pace = _Paced(fps)
+        return True
+
+    def read(self):
+        if self._cap is None:
+            return False, None
+        self._pace.wait()
+        ok, frame = super().read()
+        if not ok and self.loop:
+            import cv2
+            self._cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ok, frame = super().read()
+        return ok, frame
+
+    def describe(self) -> str:
+        return f"file:{self.path}"
+
+
+class LandmarkReplaySource(CaptureSource):
+    kind = LANDMARKS
+    name = "landmarks"
+
+    def __init__(self, path: str, loop: bool = True, fps: float = DEFAULT_FPS):
+        self.path = path
+        self.loop = loop
+        self.fps = fps
+        self._data = None
+        self._i = 0
+
+    def open(self) -> bool:
+        try:
+            data = np.load(self.path)
+        except (OSError, ValueError) as e:
+            print(f"Landmark replay: cannot load {self.path}: {e}")
+            return False
+        if isinstance(data, np.lib.npyio.NpzFile):
+            data = data[data.files[0]]
+        if data.ndim != 3 or data.shape[1] < 478:
+            print(f"Landmark replay: expected (T, 478, 3), got {data.shape}")
+            return False
+        self._data = data
+        self._i = 0
+        self._pace = _Paced(self.fps)
+        return True
+
+    def read(self):
+        if self._data is None:
+            return False, None
+        if self._i >= len(self._data):
+            if not self.loop:
+                return False, None
+            self._i = 0
+        self._pace.wait()
+        lm = self._data[self._i]
+        self._i += 1
+        return True, lm
+
+    def describe(self) -> str:
+        return f"landmarks:{self.path}"
+
+
+class SyntheticSource(CaptureSource):
+    """Generated landmarks for a face tracing a slow Lissajous path over the screen."""
+    kind = LANDMARKS
+    name = "synthetic"
+
+    def __init__(self, fps: float = DEFAULT_FPS, noise: float = 0.0003, seed: Optional[int] = None):
+        self.fps = fps
+        self.noise = noise
+        self._rng = np.random.default_rng(seed)
+        self._t0 = 0.0
+
+    def open(self) -> bool:
+        from services import synthetic_face  # noqa: F401  (fail early if unavailable)
+        self._pace = _Paced(self.fps)
+        self._t0 = time.monotonic()
+        return True
+
+    def read(self):
+        from services.synthetic_face import render_landmarks
+        self._pace.wait()
+        t = time.monotonic() - self._t0
+        target = (0.5 + 0.4 * np.sin(0.7 * t), 0.5 + 0.35 * np.sin(0.45 * t + 1.0))
+        yaw, pitch = 0.08 * np.sin(0.2 * t), 0.05 * np.sin(0.13 * t)
+        return True, render_landmarks(target, yaw, pitch, noise=self.noise, rng=self._rng)
+
+
+class PushSource(CaptureSource):
+    """Frames or landmarks delivered by a client (see /gaze/push).
+
+    Only the newest item is kept: a slow loop never builds a backlog. read()
+    blocks without spinning until something arrives or the source is closed.
+    """
+    name = "push"
+
+    def __init__(self, kind: str = FRAMES):
+        self.kind = kind
+        self._items = deque(maxlen=1)
+        self._cond = threading.Condition()
+        self._closed = False
+        self.dropped = 0
+
+    def open(self) -> bool:
+        with self._cond:
+            self._closed = False
+        return True
+
+    def push(self, item) -> bool:
+        """Queues one item; returns False if an older unread item was replaced."""
+        with self._cond:
+            replaced = bool(self._items)
+            if replaced:
+                self.dropped += 1
+            self._items.append(item)
+            self._cond.notify()
+        return not replaced
+
+    def read(self):
+        with self._cond:
+            while not self._items and not self._closed:
+                self._cond.wait()
+            if not self._items:
+                return False, None
+            item = self._items.popleft()
+        if self.kind == FRAMES and isinstance(item, (bytes, bytearray)):
+            import cv2
+            item = cv2.imdecode(np.frombuffer(item, dtype=np.uint8), cv2.IMREAD_COLOR)
+            if item is None:
+                return False, None
+        return True, item
+
+    def interrupt(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    close = interrupt
+
+    def describe(self) -> str:
+        return f"push:{self.kind}"
+
+
+def source_from_spec(spec: str) -> Optional[CaptureSource]:
+    kind, _, arg = spec.strip().partition(":")
+    kind = kind.lower()
+    if kind in ("", "none"):
+        return None
+    if kind == "camera":
+        return CameraSource(int(arg or 0))
+    if kind == "file":
+        return VideoFileSource(arg)
+    if kind == "landmarks":
+        return LandmarkReplaySource(arg)
+    if kind == "synthetic":
+        return SyntheticSource()
+    if kind == "push":
+        return PushSource(arg or FRAMES)
+    raise ValueError(f"Unknown capture source: {spec!r}")
+
+
+# -------------------------
+# Active source
+# -------------------------
+_lock = threading.Lock()
+_current: Optional[CaptureSource] = None
+_changed = threading.Event()
+
+
+def current() -> Optional[CaptureSource]:
+    return _current
+
+
+def set_source(source: Optional[CaptureSource]):
+    """Makes `source` active (None = idle) and wakes the gaze loop."""
+    global _current
+    with _lock:
+        old, _current = _current, source
+    if old is not None and old is not source:
+        old.interrupt()
+    _changed.set()
+
+
+# Client pushes (/gaze/push), newest last. The newest live push is active;
+# when it ends the previous live push, or the source from before the first
+# push, takes over. A push that has ended is never restored.
+_push_lock = threading.Lock()
+_pushes = []
+_before_pushes: Optional[CaptureSource] = None
+
+
+def begin_push(source: PushSource):
+    """Makes a client's push source active until end_push()."""
+    global _before_pushes
+    with _push_lock:
+        if not _pushes:
+            _before_pushes = _current
+        _pushes.append(source)
+        set_source(source)
+
+
+def end_push(source: PushSource):
+    global _before_pushes
+    with _push_lock:
+        if source in _pushes:
+            _pushes.remove(source)
+        if _current is source:
+            set_source(_pushes[-1] if _pushes else _before_pushes)
+        if not _pushes:
+            _before_pushes = None
+    source.close()
+
+
+def set_source_from_env():
+    set_source(source_from_spec(os.getenv("GAZE_SOURCE", DEFAULT_SPEC)))
+
+
+def wait_for_change(timeout: Optional[float] = None) -> bool:
+    """Blocks until set_source() is called (or timeout); clears the flag."""
+    changed = _changed.wait(timeout)
+    _changed.clear()
+    return changed
+
+
+def status() -> dict:
+    src = _current
+    return {"source": src.describe() if src else None}
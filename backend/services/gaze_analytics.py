@@ -0,0 +1,219 @@
+"""Streaming gaze analytics: where the student looked, without keeping samples.
+
+Every calibrated gaze sample updates the current session in O(1):
+
+  - a fixed HEATMAP_COLS x HEATMAP_ROWS histogram of dwell seconds over
+    the screen;
+  - dwell counters per question grid tile, using the layout of
+    GazeQuestionsGrid.jsx (3x2 tiles; tile 5 is "back"). Counters are
+    total seconds, visits, longest visit, and visits long enough to
+    select (DWELL_S).
+
+Each sample is weighted by the capture time since the previous one, so
+totals are in seconds whatever the frame rate. Gaps of MAX_FRAME_GAP_S or
+more (face lost) count nothing. A session's memory is fixed however long
+it runs, and only the last MAX_SESSIONS sessions are kept.
+
+The backend doesn't know how many questions are on screen, so tiles are
+reported by position; the client maps them to its questions.
+"""
+import base64
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+
+from services.gaze_predict import MAX_FRAME_GAP_S
+
+HEATMAP_COLS = 32
+HEATMAP_ROWS = 18
+MAX_SESSIONS = 32
+
+# Question grid as laid out by GazeQuestionsGrid.jsx (screen fractions)
+GRID_LEFT, GRID_TOP, GRID_WIDTH, GRID_HEIGHT = 0.06, 0.06, 0.88, 0.72
+GRID_COLS, GRID_ROWS = 3, 2
+TILE_COUNT = GRID_COLS * GRID_ROWS
+TILE_BACK = 5
+OFF_GRID = -1
+DWELL_S = 2.0  # DWELL_MS in the grid: a visit this long selects the tile
+
+
+def tile_at(x: float, y: float) -> int:
+    """Grid tile under (x, y), or OFF_GRID; same hit test as hitGrid()."""
+    rx = (x - GRID_LEFT) / GRID_WIDTH
+    ry = (y - GRID_TOP) / GRID_HEIGHT
+    if not (0.0 <= rx <= 1.0 and 0.0 <= ry <= 1.0):
+        return OFF_GRID
+    col = min(GRID_COLS - 1, int(rx * GRID_COLS))
+    row = min(GRID_ROWS - 1, int(ry * GRID_ROWS))
+    return row * GRID_COLS + col
+
+
+def encode_heatmap(heatmap: np.ndarray) -> dict:
+    """uint8 cells, row-major and scaled so 255 == max_s, base64-encoded (~800 bytes)."""
+    peak = float(heatmap.max())
+    cells = np.zeros(heatmap.shape, np.uint8) if peak <= 0 else np.rint(heatmap * (255 / peak)).astype(np.uint8)
+    return {
+        "cols": heatmap.shape[1],
+        "rows": heatmap.shape[0],
+        "max_s": round(peak, 3),
+        "data": base64.b64encode(cells.tobytes()).decode("ascii"),
+    }
+
+
+class Session:
+    """Aggregates for one session. Not thread-safe; GazeAnalytics locks."""
+
+    def __init__(self, session_id: int, label: str = ""):
+        self.id = session_id
+        self.label = label
+        self.started_ms = int(time.time() * 1000)
+        self.ended_ms = None
+        self.heatmap = np.zeros((HEATMAP_ROWS, HEATMAP_COLS), np.float32)
+        # Plain lists: scalar updates on them are cheaper than on arrays
+        self.tile_s = [0.0] * TILE_COUNT
+        self.tile_visits = [0] * TILE_COUNT
+        self.tile_longest_s = [0.0] * TILE_COUNT
+        self.tile_selects = [0] * TILE_COUNT
+        self.samples = 0
+        self.tracked_s = 0.0
+        self.blink_s = 0.0
+        self.off_grid_s = 0.0
+        self._last_capture = None
+        self._tile = OFF_GRID
+        self._visit_s = 0.0
+
+    def add(self, x: float, y: float, capture_s: float, blink: bool):
+        last = self._last_capture
+        if last is not None and capture_s <= last:
+            return  # same frame published again
+        self._last_capture = capture_s
+        self.samples += 1
+        if last is None or capture_s - last >= MAX_FRAME_GAP_S:
+            self._end_visit()
+            return
+        dt = capture_s - last
+        self.tracked_s += dt
+        if blink:
+            # Eyes closed: the position is noise, but the visit goes on
+            self.blink_s += dt
+            return
+
+        col = min(HEATMAP_COLS - 1, int(x * HEATMAP_COLS))
+        row = min(HEATMAP_ROWS - 1, int(y * HEATMAP_ROWS))
+        self.heatmap[row, col] += dt
+
+        tile = tile_at(x, y)
+        if tile != self._tile:
+            self._end_visit()
+            self._tile = tile
+            if tile != OFF_GRID:
+                self.tile_visits[tile] += 1
+        if tile == OFF_GRID:
+            self.off_grid_s += dt
+        else:
+            self.tile_s[tile] += dt
+            self._visit_s += dt
+
+    def _end_visit(self):
+        tile = self._tile
+        if tile != OFF_GRID:
+            self.tile_longest_s[tile] = max(self.tile_longest_s[tile], self._visit_s)
+            self.tile_selects[tile] += self._visit_s >= DWELL_S
+        self._tile = OFF_GRID
+        self._visit_s = 0.0
+
+    def end(self):
+        self._end_visit()
+        self._last_capture = None
+        self.ended_ms = int(time.time() * 1000)
+
+    def summary(self, heatmap: bool = True) -> dict:
+        longest = list(self.tile_longest_s)
+        selects = list(self.tile_selects)
+        if self._tile != OFF_GRID:  # count the visit in progress
+            longest[self._tile] = max(longest[self._tile], self._visit_s)
+            selects[self._tile] += self._visit_s >= DWELL_S
+        out = {
+            "id": self.id,
+            "label": self.label,
+            "started_ms": self.started_ms,
+            "ended_ms": self.ended_ms,
+            "samples": self.samples,
+            "tracked_s": round(self.tracked_s, 3),
+            "blink_s": round(self.blink_s, 3),
+            "off_grid_s": round(self.off_grid_s, 3),
+            "tiles": [
+                {
+                    "tile": i,
+                    "back": i == TILE_BACK,
+                    "dwell_s": round(self.tile_s[i], 3),
+                    "visits": self.tile_visits[i],
+                    "longest_s": round(longest[i], 3),
+                    "selects": selects[i],
+                }
+                for i in range(TILE_COUNT)
+            ],
+        }
+        if heatmap:
+            out["heatmap"] = encode_heatmap(self.heatmap)
+        return out
+
+
+class GazeAnalytics:
+    """Current session plus the most recent finished ones."""
+
+    def __init__(self, max_sessions: int = MAX_SESSIONS):
+        self.max_sessions = max_sessions
+        self._lock = threading.Lock()
+        self._sessions = OrderedDict()  # id -> Session, oldest first
+        self._ids = itertools.count(1)
+        self.current: Optional[Session] = None
+
+    def start(self, label: str = "") -> int:
+        """Ends the current session (if any) and starts a new one."""
+        with self._lock:
+            self._stop_locked()
+            session = Session(next(self._ids), label)
+            self._sessions[session.id] = session
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+            self.current = session
+            return session.id
+
+    def stop(self) -> Optional[int]:
+        with self._lock:
+            return self._stop_locked()
+
+    def _stop_locked(self):
+        session, self.current = self.current, None
+        if session is None:
+            return None
+        session.end()
+        return session.id
+
+    def add(self, x: float, y: float, capture_s: float, blink: bool = False):
+        """One gaze sample (screen fractions, capture time in epoch seconds)."""
+        if self.current is None:
+            return
+        with self._lock:
+            if self.current is not None:
+                self.current.add(x, y, capture_s, blink)
+
+    def get(self, session_id: int, heatmap: bool = True) -> Optional[dict]:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            return session.summary(heatmap) if session is not None else None
+
+    def summary(self, heatmap: bool = False) -> dict:
+        with self._lock:
+            return {
+                "current": self.current.id if self.current is not None else None,
+                "sessions": [s.summary(heatmap) for s in reversed(self._sessions.values())],
+            }
+
+
+analytics = GazeAnalytics()
@@ -0,0 +1,125 @@
+from typing import Optional, Tuple
+
+import numpy as np
+
+# -------------------------
+# Landmark indices (MediaPipe FaceLandmarker, 478 points)
+# -------------------------
+# "L" is the eye on the image-left side, "R" the one on the image-right side.
+LEFT_IRIS_IDX = (468, 469, 470, 471, 472)
+RIGHT_IRIS_IDX = (473, 474, 475, 476, 477)
+L_INNER, L_OUTER = 133, 33
+R_INNER, R_OUTER = 362, 263
+EYEBROW_STABLE = 107
+CHEEKBONE_STABLE = 118
+R_EYEBROW_STABLE = 336
+R_CHEEKBONE_STABLE = 347
+NOSE_TIP = 1
+
+# Rows gathered once per frame; every feature below is computed from this block.
+GAZE_IDX = np.array(
+    LEFT_IRIS_IDX + RIGHT_IRIS_IDX + (
+        L_OUTER, R_INNER,                        # 10, 11: image-left corner of each eye
+        L_INNER, R_OUTER,                        # 12, 13: image-right corner of each eye
+        EYEBROW_STABLE, R_EYEBROW_STABLE,        # 14, 15
+        CHEEKBONE_STABLE, R_CHEEKBONE_STABLE,    # 16, 17
+        NOSE_TIP,                                # 18
+    )
+)
+
+# Head-pose compensation: converts head rotation into the same units as the
+# normalised iris offset, so "turn head" and "move eyes" land on one scale.
+# Matrix gains are per radian; landmark gains are per inter-ocular distance.
+# Tuned on services.synthetic_face. Signs follow MediaPipe's canonical face
+# axes (x image-right, y up, z toward the camera); bench.head_pose_convention
+# checks them against the bundled canonical mesh or a recorded session.
+HEAD_YAW_GAIN = 0.30
+HEAD_PITCH_GAIN = 0.16
+HEAD_YAW_GAIN_LM = 0.75
+HEAD_PITCH_GAIN_LM = 0.40
+
+
+def gather_points(landmarks, idx=GAZE_IDX, mirror: bool = False) -> np.ndarray:
+    """Returns the (len(idx), 2) block of x/y coordinates (GAZE_IDX by default).
+
+    Accepts either MediaPipe landmark objects or an (N, >=2) array
+    (recorded/replayed landmark streams). `mirror` maps x -> 1 - x, i.e.
+    landmarks detected on a raw camera frame into the selfie view.
+    """
+    if isinstance(landmarks, np.ndarray):
+        pts = landmarks[np.asarray(idx), :2].astype(np.float64)
+    else:
+        pts = np.array([(landmarks[i].x, landmarks[i].y) for i in idx], dtype=np.float64)
+    if mirror:
+        pts[:, 0] = 1.0 - pts[:, 0]
+    return pts
+
+
+def head_pose(pts: np.ndarray, transform: Optional[np.ndarray] = None,
+              mirror: bool = False) -> Tuple[float, float]:
+    """Head yaw/pitch already scaled into iris-offset units.
+
+    Uses the FaceLandmarker facial transformation matrix when available,
+    otherwise the nose tip offset from the mid-point of the eye corners.
+    Positive yaw/pitch means the face turned toward image-right/down.
+    """
+    if transform is not None:
+        rot = np.asarray(transform, dtype=np.float64)[:3, :3]
+        yaw = np.arcsin(np.clip(rot[0, 2], -1.0, 1.0))
+        if mirror:
+            yaw = -yaw
+        pitch = np.arcsin(np.clip(-rot[1, 2], -1.0, 1.0))
+        return float(yaw * HEAD_YAW_GAIN), float(pitch * HEAD_PITCH_GAIN)
+
+    corners = pts[10:14]
+    mid = corners.mean(axis=0)
+    iod = np.linalg.norm(pts[13] - pts[10]) + 1e-9  # mirror-invariant
+    off = (pts[18] - mid) / iod
+    return float(off[0] * HEAD_YAW_GAIN_LM), float(off[1] * HEAD_PITCH_GAIN_LM)
+
+
+def eye_features(landmarks, transform: Optional[np.ndarray] = None,
+                 mirror: bool = False) -> Tuple[float, float]:
+    """Binocular, head-compensated gaze feature (rx, ry) for one frame.
+
+    With `mirror`, landmarks come from an unflipped camera frame: x is
+    mirrored and each eye's corners swap sides, so rx still grows toward
+    the right of the selfie view.
+    """
+    pts = gather_points(landmarks, mirror=mirror)
+
+    iris = pts[:10].reshape(2, 5, 2).mean(axis=1)
+    lo, hi = pts[10:12], pts[12:14]
+    if mirror:
+        lo, hi = hi, lo
+    top, bot = pts[14:16], pts[16:18]
+
+    u = (iris[:, 0] - lo[:, 0]) / (hi[:, 0] - lo[:, 0] + 1e-9)
+    v = (iris[:, 1] - top[:, 1]) / (bot[:, 1] - top[:, 1] + 1e-9)
+
+    yaw, pitch = head_pose(pts, transform, mirror)
+    return float(u.mean() + yaw), float(v.mean() + pitch)
+
+
+def single_eye_features(landmarks) -> Tuple[float, float]:
+    """Original single-iris feature (kept for replay comparisons)."""
+    pts = gather_points(landmarks)
+    iris, outer, inner = pts[0], pts[10], pts[12]
+    top, bot = pts[14], pts[16]
+    rx = (iris[0] - outer[0]) / (inner[0] - outer[0])
+    ry = (iris[1] - top[1]) / (bot[1] - top[1])
+    return float(rx), float(ry)
+
+
+def map_to_screen(curr_rx, curr_ry, corners):
+    tl, tr, bl, br, mid = corners
+    if curr_rx < mid[0]:
+        norm_x = np.interp(curr_rx, [(tl[0] + bl[0]) / 2, mid[0]], [0.0, 0.5])
+    else:
+        norm_x = np.interp(curr_rx, [mid[0], (tr[0] + br[0]) / 2], [0.5, 1.0])
+
+    if curr_ry < mid[1]:
+        norm_y = np.interp(curr_ry, [(tl[1] + tr[1]) / 2, mid[1]], [0.0, 0.5])
+    else:
+        norm_y = np.interp(curr_ry, [mid[1], (bl[1] + br[1]) / 2], [0.5, 1.0])
+    return float(norm_x), float(norm_y)
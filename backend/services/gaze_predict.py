@@ -0,0 +1,102 @@
+"""Latency compensation for published gaze.
+
+A sample reaches the screen well after the eye was where it says:
+
+  - pipeline delay: capture -> publish (inference, features, mapping),
+    measured per sample from the capture timestamp;
+  - smoothing lag: the tracker's EMA with weight `a` trails a steady
+    motion by (1 - a) / a frames;
+  - delivery: /gaze/ws polls at WS_POLL_S, on average half a period late.
+
+`MotionPredictor` estimates velocity from successive smoothed samples
+(timed by capture, not arrival) and extrapolates over those delays to
+give a position for "now". The horizon is capped, and the velocity is
+itself smoothed, which limits overshoot when the eye stops after a
+saccade. Raw samples are still published; prediction is opt-in per client.
+"""
+from typing import NamedTuple
+
+WS_POLL_S = 1 / 30
+MAX_HORIZON_S = 0.15
+VELOCITY_ALPHA = 0.5
+DELAY_ALPHA = 0.05
+MAX_FRAME_GAP_S = 0.25  # longer gaps (face lost) restart the estimate
+
+
+class Prediction(NamedTuple):
+    px: float
+    py: float
+    vx: float  # screen fractions per second
+    vy: float
+
+
+class DelayEstimator:
+    """EMA of capture -> publish delay and of the frame interval, in seconds."""
+
+    def __init__(self, alpha: float = DELAY_ALPHA):
+        self.alpha = alpha
+        self.delay_s = None
+        self.frame_s = None
+        self._last_capture = None
+
+    def update(self, capture_s: float, now_s: float):
+        d = max(0.0, now_s - capture_s)
+        self.delay_s = d if self.delay_s is None else self.delay_s + self.alpha * (d - self.delay_s)
+        if self._last_capture is not None:
+            gap = capture_s - self._last_capture
+            if 0 < gap < MAX_FRAME_GAP_S:
+                self.frame_s = gap if self.frame_s is None else self.frame_s + self.alpha * (gap - self.frame_s)
+        self._last_capture = capture_s
+
+    def status(self) -> dict:
+        ms = lambda s: None if s is None else round(s * 1000, 1)  # noqa: E731
+        return {"pipeline_delay_ms": ms(self.delay_s), "frame_interval_ms": ms(self.frame_s)}
+
+
+class MotionPredictor:
+    def __init__(self, alpha_x: float, alpha_y: float,
+                 velocity_alpha: float = VELOCITY_ALPHA, max_horizon_s: float = MAX_HORIZON_S):
+        # Frames of EMA lag per axis
+        self.lag_frames = ((1 - alpha_x) / alpha_x, (1 - alpha_y) / alpha_y)
+        self.velocity_alpha = velocity_alpha
+        self.max_horizon_s = max_horizon_s
+        self.delay = DelayEstimator()
+        self.reset()
+
+    def reset(self):
+        self._prev = None  # (x, y, capture_s)
+        self.vx = self.vy = 0.0
+
+    def horizons(self):
+        """Seconds to extrapolate on each axis."""
+        delay = self.delay.delay_s or 0.0
+        frame = self.delay.frame_s or WS_POLL_S
+        base = delay + WS_POLL_S / 2
+        return tuple(min(self.max_horizon_s, base + lag * frame) for lag in self.lag_frames)
+
+    def update(self, x: float, y: float, capture_s: float, now_s: float) -> Prediction:
+        """Feeds one smoothed sample; returns its extrapolation to `now_s` + delivery."""
+        self.delay.update(capture_s, now_s)
+        prev = self._prev
+        if prev is not None and capture_s <= prev[2]:
+            # Same frame again (the detector had no newer result): keep the velocity
+            return self._extrapolate(x, y)
+        self._prev = (x, y, capture_s)
+        if prev is None or capture_s - prev[2] >= MAX_FRAME_GAP_S:
+            self.vx = self.vy = 0.0
+            return Prediction(x, y, 0.0, 0.0)
+
+        dt = capture_s - prev[2]
+        a = self.velocity_alpha
+        self.vx += a * ((x - prev[0]) / dt - self.vx)
+        self.vy += a * ((y - prev[1]) / dt - self.vy)
+        return self._extrapolate(x, y)
+
+    def _extrapolate(self, x: float, y: float) -> Prediction:
+        hx, hy = self.horizons()
+        return Prediction(
+            min(1.0, max(0.0, x + self.vx * hx)),
+            min(1.0, max(0.0, y + self.vy * hy)),
+            self.vx,
+            self.vy,
+        )
@@ -1,23 +1,58 @@
 import os
+import random
 import time
 import threading
-from typing import Dict, Any
+from typing import NamedTuple
 
-import cv2
 import numpy as np
-import mediapipe as mp
+
+from services import capture, gaze_features, metrics, model_loader
+from services.gaze_analytics import analytics
+from services.gaze_predict import MotionPredictor
+from services.preprocess import FramePreprocessor
+from services.profiler import slow_frames
+from services.shared_gaze import SharedGazeState, DEFAULT_NAME as SHARED_DEFAULT_NAME
+from services.gaze_features import L_INNER, L_OUTER
 
 # -------------------------
 # Shared gaze state
 # -------------------------
-gaze_lock = threading.Lock()
-latest_gaze: Dict[str, Any] = {
-    "x": 0.5,
-    "y": 0.5,
-    "calibrated": False,
-    "blink": False,     # NEW: Added blink state
-    "ts_ms": 0
-}
+class GazeSnapshot(NamedTuple):
+    """Immutable gaze state. Replaced wholesale on every update, never mutated."""
+    x: float = 0.5
+    y: float = 0.5
+    calibrated: bool = False
+    blink: bool = False
+    ts_ms: int = 0          # published
+    capture_ts_ms: int = 0  # frame captured (x, y describe this moment)
+    # Latency-compensated position for ts_ms + delivery, and gaze velocity
+    # (screen fractions/s); see services.gaze_predict
+    px: float = 0.5
+    py: float = 0.5
+    vx: float = 0.0
+    vy: float = 0.0
+    seq: int = 0  # bumped on every publish; equal seq == unchanged
+
+PREDICTED_FIELDS = ("px", "py", "vx", "vy")
+
+# Readers just load the reference (atomic); only writers serialise, so a WS
+# tick never waits on the gaze loop.
+_snapshot = GazeSnapshot()
+_publish_lock = threading.Lock()
+
+# Cross-worker sharing (GAZE_SHARED=1); None when running single-process
+_shared = None
+
+def _is_follower():
+    return _shared is not None and not _shared.is_producer
+
+def publish_gaze(**changes):
+    """Swaps in a new snapshot with `changes` applied and the next seq."""
+    global _snapshot
+    with _publish_lock:
+        _snapshot = _snapshot._replace(seq=_snapshot.seq + 1, **changes)
+        if _shared is not None and _shared.is_producer:
+            _shared.write(_snapshot)
 
 # -------------------------
 # Calibration & MediaPipe Constants
@@ -25,16 +60,14 @@ latest_gaze: Dict[str, Any] = {
 corners = []
 is_calibrated = False
 smooth_x, smooth_y = 0.5, 0.5
+# EMA weight of each new sample
+SMOOTH_ALPHA_X = 0.1
+SMOOTH_ALPHA_Y = 0.18
+predictor = MotionPredictor(SMOOTH_ALPHA_X, SMOOTH_ALPHA_Y)
 
-BaseOptions = mp.tasks.BaseOptions
-FaceLandmarker = mp.tasks.vision.FaceLandmarker
-FaceLandmarkerOptions = mp.tasks.vision.FaceLandmarkerOptions
-VisionRunningMode = mp.tasks.vision.RunningMode
-
-LEFT_IRIS = 468
-L_INNER, L_OUTER = 133, 33
-EYEBROW_STABLE = 107
-CHEEKBONE_STABLE = 118
+# Set once the first face has been tracked (ms since process start); before
+# calibration that sample only carries blink state
+first_sample_ms = None
 
 # Blink Detection Landmarks
 L_TOP_LID = 159 
@@ -42,60 +75,70 @@ L_BOT_LID = 145
 BLINK_THRESHOLD = 0.22 # Sensitivity: lower = harder to blink
 
 latest_result = None
+latest_result_capture_ms = 0  # capture time of the frame latest_result came from
+# capture_ms -> perf_counter at detect_async, for frames awaiting a result.
+# LIVE_STREAM skips frames while the detector is busy; those never get one.
+_submitted = {}
+MAX_SUBMITTED = 64
+# True while latest_result comes from unflipped camera frames: the selfie
+# mirror is then applied to landmark coordinates instead of pixels.
+mirror_landmarks = False
+
 def result_callback(result, output_image, timestamp_ms):
-    global latest_result
+    global latest_result, latest_result_capture_ms
+    # timestamp_ms is the frame's capture time, passed to detect_async
+    latest_result_capture_ms = timestamp_ms
     latest_result = result
+    # Inference is submit -> result; timing from the capture timestamp
+    # would add preprocessing and the wait for the detector
+    submitted = _submitted.pop(timestamp_ms, None)
+    if submitted is not None:
+        metrics.STAGE_INFERENCE.observe(time.perf_counter() - submitted)
+
+BLINK_IDX = (L_TOP_LID, L_BOT_LID, L_INNER, L_OUTER)
 
 def check_blink(landmarks):
     """Calculates EAR to detect if eye is closed."""
-    top = landmarks[L_TOP_LID]
-    bot = landmarks[L_BOT_LID]
-    inner = landmarks[L_INNER]
-    outer = landmarks[L_OUTER]
+    top, bot, inner, outer = gaze_features.gather_points(landmarks, BLINK_IDX)
 
     # Euclidean distance for Vertical vs Horizontal
-    v_dist = np.linalg.norm(np.array([top.x, top.y]) - np.array([bot.x, bot.y]))
-    h_dist = np.linalg.norm(np.array([inner.x, inner.y]) - np.array([outer.x, outer.y]))
-    
+    v_dist = np.linalg.norm(top - bot)
+    h_dist = np.linalg.norm(inner - outer)
+
     return float(v_dist / h_dist) < BLINK_THRESHOLD
 
-def get_eye_coords(landmarks):
-    iris = landmarks[LEFT_IRIS]
-    top, bot = landmarks[EYEBROW_STABLE], landmarks[CHEEKBONE_STABLE]
-    inner, outer = landmarks[L_INNER], landmarks[L_OUTER]
-    rx = (iris.x - outer.x) / (inner.x - outer.x)
-    ry = (iris.y - top.y) / (bot.y - top.y)
-    return rx, ry
+def head_transform(result):
+    """Facial transformation matrix of the first face, if the model produced one."""
+    mats = getattr(result, "facial_transformation_matrixes", None)
+    return mats[0] if mats else None
 
-def map_to_screen(curr_rx, curr_ry):
-    tl, tr, bl, br, mid = corners
-    if curr_rx < mid[0]:
-        norm_x = np.interp(curr_rx, [(tl[0] + bl[0]) / 2, mid[0]], [0.0, 0.5])
-    else:
-        norm_x = np.interp(curr_rx, [mid[0], (tr[0] + br[0]) / 2], [0.5, 1.0])
+def get_eye_coords(landmarks, transform=None):
+    """Both irises + head pose, see services.gaze_features.eye_features."""
+    return gaze_features.eye_features(landmarks, transform, mirror_landmarks)
 
-    if curr_ry < mid[1]:
-        norm_y = np.interp(curr_ry, [(tl[1] + tr[1]) / 2, mid[1]], [0.0, 0.5])
-    else:
-        norm_y = np.interp(curr_ry, [mid[1], (bl[1] + br[1]) / 2], [0.5, 1.0])
-    return float(norm_x), float(norm_y)
+def map_to_screen(curr_rx, curr_ry):
+    return gaze_features.map_to_screen(curr_rx, curr_ry, corners)
 
 def reset_calibration():
     global corners, is_calibrated, smooth_x, smooth_y
+    if _is_follower():
+        _shared.call("reset")
+        return
     corners = []
     is_calibrated = False
     smooth_x, smooth_y = 0.5, 0.5
-    with gaze_lock:
-        latest_gaze["calibrated"] = False
-        latest_gaze["x"] = 0.5
-        latest_gaze["y"] = 0.5
+    predictor.reset()
+    analytics.stop()
+    publish_gaze(calibrated=False, x=0.5, y=0.5, px=0.5, py=0.5, vx=0.0, vy=0.0)
     print("Calibration has been fully reset via long blink.")
 
 def capture_calibration_point():
     global corners, is_calibrated
+    if _is_follower():
+        return _shared.call("capture")["ok"]
     if latest_result and latest_result.face_landmarks:
         landmarks = latest_result.face_landmarks[0]
-        curr_rx, curr_ry = get_eye_coords(landmarks)
+        curr_rx, curr_ry = get_eye_coords(landmarks, head_transform(latest_result))
         
         if len(corners) < 5:
             corners.append([curr_rx, curr_ry])
@@ -104,66 +147,295 @@ def capture_calibration_point():
         # FIX: Only set this at EXACTLY 5
         if len(corners) == 5:
             is_calibrated = True
-            with gaze_lock:
-                latest_gaze["calibrated"] = True # Only now does the frontend stop listening
+            publish_gaze(calibrated=True) # Only now does the frontend stop listening
+            if analytics.current is None:
+                analytics.start("calibrated")
             print("--- FULLY CALIBRATED ---")
         return True
     return False
 
-def gaze_loop():
-    global is_calibrated, smooth_x, smooth_y
-    model_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "face_landmarker.task"))
-    options = FaceLandmarkerOptions(
-        base_options=BaseOptions(model_asset_path=model_path),
-        running_mode=VisionRunningMode.LIVE_STREAM,
-        result_callback=result_callback
-    )
-    detector = FaceLandmarker.create_from_options(options)
-    cap = cv2.VideoCapture(0)
+def calibration_count():
+    if _is_follower():
+        return _shared.call("count")["count"]
+    return len(corners)
+
+def _handle_command(command, *args):
+    """Runs a calibration or analytics command forwarded by another worker."""
+    ok = True
+    if command == "analytics":
+        return {"ok": True, "analytics": analytics_summary(*args)}
+    if command == "analytics_start":
+        return {"ok": True, "id": start_analytics_session(*args)}
+    if command == "analytics_stop":
+        return {"ok": True, "id": stop_analytics_session()}
+    if command == "reset":
+        reset_calibration()
+    elif command == "capture":
+        ok = capture_calibration_point()
+    elif command != "count":
+        return {"ok": False, "count": len(corners), "error": f"unknown command {command!r}"}
+    return {"ok": ok, "count": len(corners)}
+
+def _stage(stages, name, hist, t0):
+    """Records one pipeline stage in the histogram and the per-frame breakdown."""
+    now = time.perf_counter()
+    stages[name] = now - t0
+    hist.observe(now - t0)
+    return now
+
+class LandmarkResult:
+    """Stand-in for a FaceLandmarker result when landmarks come from a capture source."""
+    __slots__ = ("face_landmarks", "facial_transformation_matrixes")
+
+    def __init__(self, landmarks):
+        self.face_landmarks = [landmarks]
+        self.facial_transformation_matrixes = None
+
+def process_result(result, stages, capture_ms):
+    """Blink, features, mapping and publish for one detector/landmark result.
+
+    `capture_ms` is when the result's frame was captured (epoch ms).
+    """
+    global smooth_x, smooth_y, first_sample_ms
+    if not (result and result.face_landmarks):
+        metrics.FRAMES_FACE_LOST.inc()
+        return
+
+    if first_sample_ms is None:
+        first_sample_ms = model_loader.uptime_ms()
+    landmarks = result.face_landmarks[0]
+    t0 = time.perf_counter()
+
+    # Detect blink every frame
+    blinking = check_blink(landmarks)
+
+    if is_calibrated and len(corners) == 5:
+        curr_rx, curr_ry = get_eye_coords(landmarks, head_transform(result))
+        t0 = _stage(stages, "features", metrics.STAGE_FEATURES, t0)
+        norm_x, norm_y = map_to_screen(curr_rx, curr_ry)
+        smooth_x = (smooth_x * (1 - SMOOTH_ALPHA_X)) + (norm_x * SMOOTH_ALPHA_X)
+        smooth_y = (smooth_y * (1 - SMOOTH_ALPHA_Y)) + (norm_y * SMOOTH_ALPHA_Y)
+        x, y = float(np.clip(smooth_x, 0, 1)), float(np.clip(smooth_y, 0, 1))
+        now = time.time()
+        pred = predictor.update(x, y, capture_ms / 1000, now)
+        _stage(stages, "mapping", metrics.STAGE_MAPPING, t0)
 
+        publish_gaze(
+            x=x,
+            y=y,
+            blink=blinking,
+            calibrated=True,
+            ts_ms=int(now * 1000),
+            capture_ts_ms=int(capture_ms),
+            **pred._asdict(),
+        )
+        analytics.add(x, y, capture_ms / 1000, blinking)
+    else:
+        # Update blink even if not calibrated
+        snap = _snapshot
+        if snap.blink != blinking or snap.calibrated:
+            publish_gaze(blink=blinking, calibrated=False)
+
+# Reconnect backoff for sources that fail to open or stop delivering
+BACKOFF_MIN_S = 0.5
+BACKOFF_MAX_S = 30.0
+MAX_CONSECUTIVE_FAILURES = 30
+
+def run_source(source, detector):
+    """Reads `source` until it fails repeatedly or another source is selected.
+
+    Returns True if at least one frame was processed.
+    """
+    global mirror_landmarks
+    mp = preprocess = None
+    if source.kind == capture.FRAMES:
+        import mediapipe as mp
+        preprocess = FramePreprocessor()
+    mirror_landmarks = mp is not None
+
+    last_result = None
+    failures = 0
+    produced = False
+    while capture.current() is source:
+        t0 = time.perf_counter()
+        ok, data = source.read()
+        capture_ms = int(time.time() * 1000)
+        # read() blocks until the next frame (camera rate, pacing, pushes):
+        # that is idle time, so it stays out of the stage breakdown
+        t0 = metrics.observe_since(metrics.READ_WAIT_SECONDS, t0)
+        if ok:
+            metrics.FRAMES_TOTAL.inc()
+            try:
+                last_result = _process_frame(data, t0, capture_ms, mp, preprocess, detector, last_result)
+            except Exception as e:
+                # A malformed frame must not end the loop: drop it like a failed read
+                ok = False
+                if failures == 0:
+                    print(f"Gaze frame dropped: {type(e).__name__}: {e}")
+        if not ok:
+            metrics.FRAMES_DROPPED.inc()
+            failures += 1
+            if failures >= MAX_CONSECUTIVE_FAILURES:
+                break
+            continue
+        failures = 0
+        produced = True
+    return produced
+
+def _process_frame(data, t0, capture_ms, mp, preprocess, detector, last_result):
+    """Detector (or landmark) result, features and publish for one read frame.
+
+    Returns the detector result used, for spotting reused LIVE_STREAM results.
+    """
+    global latest_result
+    stages = {}
+    if mp is not None:
+        mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=preprocess(data))
+        t0 = _stage(stages, "capture", metrics.STAGE_CAPTURE, t0)
+        if len(_submitted) >= MAX_SUBMITTED:
+            _submitted.clear()  # skipped frames piling up
+        _submitted[capture_ms] = t0
+        detector.detect_async(mp_image, capture_ms)
+        _stage(stages, "submit", metrics.STAGE_SUBMIT, t0)
+
+        # LIVE_STREAM: the newest result may be for an earlier frame
+        result, capture_ms = latest_result, latest_result_capture_ms
+        if result is last_result:
+            # Detector hasn't produced a newer result; reusing the previous one
+            metrics.RESULT_REUSED.inc()
+        process_result(result, stages, capture_ms)
+    else:
+        _stage(stages, "capture", metrics.STAGE_CAPTURE, t0)
+        result = LandmarkResult(data)
+        process_result(result, stages, capture_ms)
+        # Only landmarks that made it through become the calibration input
+        latest_result = result
+    slow_frames.record(stages)
+    return result
+
+def gaze_loop():
+    detector = None
+    backoff = BACKOFF_MIN_S
     try:
-        while cap.isOpened():
-            ok, frame = cap.read()
-            if not ok: continue
-            frame = cv2.flip(frame, 1)
-            mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=frame)
-            detector.detect_async(mp_image, int(time.time() * 1000))
-
-            if latest_result and latest_result.face_landmarks:
-                landmarks = latest_result.face_landmarks[0]
-                
-                # Detect blink every frame
-                blinking = check_blink(landmarks)
-
-                if is_calibrated and len(corners) == 5:
-                    curr_rx, curr_ry = get_eye_coords(landmarks)
-                    norm_x, norm_y = map_to_screen(curr_rx, curr_ry)
-                    smooth_x = (smooth_x * 0.9) + (norm_x * 0.1)
-                    smooth_y = (smooth_y * 0.82) + (norm_y * 0.18)
-
-                    with gaze_lock:
-                        latest_gaze["x"] = float(np.clip(smooth_x, 0, 1))
-                        latest_gaze["y"] = float(np.clip(smooth_y, 0, 1))
-                        latest_gaze["blink"] = blinking
-                        latest_gaze["calibrated"] = True
-                        latest_gaze["ts_ms"] = int(time.time() * 1000)
-                else:
-                    # Update blink even if not calibrated
-                    with gaze_lock:
-                        latest_gaze["blink"] = blinking
-                        latest_gaze["calibrated"] = False
+        while not _stop.is_set():
+            source = capture.current()
+            if source is None:
+                # Idle: nothing to read, sleep until a source is selected
+                capture.wait_for_change()
+                continue
+
+            if source.kind == capture.FRAMES and detector is None:
+                detector = model_loader.get_detector(result_callback)
+
+            produced = False
+            if source.kind == capture.LANDMARKS or detector is not None:
+                try:
+                    if source.open():
+                        print(f"Gaze capture source opened: {source.describe()}")
+                        try:
+                            produced = run_source(source, detector)
+                        finally:
+                            source.close()
+                    else:
+                        print(f"Gaze capture source unavailable: {source.describe()}")
+                except Exception as e:
+                    # Keep the thread alive; the source is retried after a backoff
+                    print(f"Gaze capture source failed: {source.describe()}: {type(e).__name__}: {e}")
+
+            if capture.current() is not source:
+                backoff = BACKOFF_MIN_S
+                continue
+            backoff = BACKOFF_MIN_S if produced else min(backoff * 2, BACKOFF_MAX_S)
+            # Interruptible sleep: switching sources retries immediately
+            capture.wait_for_change(backoff * random.uniform(0.8, 1.2))
     finally:
-        detector.close()
-        cap.release()
+        if detector is not None:
+            model_loader.close()
 
 _thread_started = False
-def start_gaze_thread():
-    global _thread_started
+_thread = None
+_stop = threading.Event()
+def start_gaze_thread(shared=False):
+    """Starts the gaze loop, or with `shared` joins the cross-worker election.
+
+    A worker that loses the election serves gaze from shared memory and
+    takes over (starting its own loop) if the producer process dies.
+    """
+    global _shared
+    if shared and _shared is None:
+        _shared = SharedGazeState(os.getenv("GAZE_SHM_NAME", SHARED_DEFAULT_NAME))
+        if not _shared.try_become_producer():
+            print(f"Gaze producer is pid {_shared.producer_pid()}; reading shared state")
+            _shared.wait_to_become_producer(_become_producer)
+            return
+        _become_producer()
+        return
+    _start_local_thread()
+
+def _become_producer():
+    global _snapshot
+    # The record still holds the previous producer's last state (as does a
+    # follower's copy of it). Replace it with this process's own now: the
+    # tracker may not publish again until a face shows up. Continue the
+    # shared sequence so readers never see seq go backwards.
+    last = _shared.read()
+    with _publish_lock:
+        seq = max(_snapshot.seq, last[-1] if last is not None else 0)
+        _snapshot = GazeSnapshot(seq=seq)
+    publish_gaze(calibrated=is_calibrated)
+    _shared.serve_commands(_handle_command)
+    _start_local_thread()
+
+def _start_local_thread():
+    global _thread_started, _thread
     if not _thread_started:
-        t = threading.Thread(target=gaze_loop, daemon=True)
-        t.start()
+        if capture.current() is None:
+            capture.set_source_from_env()
+        _thread = threading.Thread(target=gaze_loop, name="gaze_loop", daemon=True)
+        _thread.start()
         _thread_started = True
 
-def get_latest_gaze_snapshot():
-    with gaze_lock:
-        return dict(latest_gaze)
\ No newline at end of file
+def stop_gaze_thread(timeout=2.0):
+    """Stops the local gaze loop (app shutdown); it closes the detector on exit."""
+    if _thread is None:
+        return
+    _stop.set()
+    capture.set_source(None)  # wakes a blocked read() or idle wait
+    _thread.join(timeout)
+
+def runs_tracker():
+    """True if the gaze loop runs in this process, i.e. a capture source set here is read."""
+    return _thread_started
+
+def get_gaze_snapshot() -> GazeSnapshot:
+    """Current snapshot; lock-free. Compare .seq to detect changes."""
+    global _snapshot
+    if _is_follower():
+        rec = _shared.read()
+        if rec is not None and rec[-1] != _snapshot.seq:
+            _snapshot = GazeSnapshot(*rec)
+    return _snapshot
+
+def shared_status():
+    return _shared.status() if _shared is not None else {"shared": False}
+
+def analytics_summary(session_id=None, heatmap=False):
+    """All sessions (heatmaps optional), or one session with its heatmap; None if unknown."""
+    if _is_follower():
+        return _shared.call("analytics", session_id, heatmap)["analytics"]
+    if session_id is None:
+        return analytics.summary(heatmap)
+    return analytics.get(session_id)
+
+def start_analytics_session(label=""):
+    if _is_follower():
+        return _shared.call("analytics_start", label)["id"]
+    return analytics.start(label)
+
+def stop_analytics_session():
+    if _is_follower():
+        return _shared.call("analytics_stop")["id"]
+    return analytics.stop()
+
+def latency_status():
+    return predictor.delay.status()
@@ -0,0 +1,169 @@
+"""Lecture sessions: one transcript stream, questions generated once, fanned out.
+
+The lecturer's device posts transcript text as it is recognised. The server
+cuts it into segments and generates questions once per segment. Each
+result goes to every subscribed student. All state lives on the event
+loop; `generate` is a coroutine (the model call itself is scheduled and
+run off-loop by services.llm_scheduler).
+
+Lectures live in this process only. With `uvicorn --workers N` the
+lecturer's POSTs and a student's WS may land on different workers, so
+serve /lecture from a single worker.
+"""
+import asyncio
+import re
+import secrets
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+# Segmenting: close a segment at a sentence end once it has MIN_WORDS,
+# or unconditionally at MAX_WORDS (browser STT often has no punctuation).
+SEGMENT_MIN_WORDS = 40
+SEGMENT_MAX_WORDS = 120
+# Context handed to the model: the new segment plus a tail of the previous one
+CONTEXT_TAIL_WORDS = 40
+MAX_KEPT_SEGMENTS = 20
+SUBSCRIBER_QUEUE_SIZE = 8
+LECTURE_IDLE_TTL_S = 3 * 60 * 60
+
+_SENTENCE_END = re.compile(r"[.!?]['\")\]]?$")
+
+
+class Lecture:
+    def __init__(self, generate: Callable[[str], Awaitable[List[str]]]):
+        self.id = secrets.token_urlsafe(6)
+        self.token = secrets.token_urlsafe(16)
+        self.generate = generate
+        self.words: List[str] = []
+        self.prev_tail: List[str] = []
+        self.segments: List[dict] = []
+        self.next_index = 0
+        self.subscribers: Set[asyncio.Queue] = set()
+        self.latest: Optional[dict] = None
+        self.last_active = time.monotonic()
+        self.upstream_calls = 0
+        self._tasks: Set[asyncio.Task] = set()
+
+    # ---- transcript ----
+    def add_text(self, text: str, final: bool = False) -> List[int]:
+        """Appends transcript text; returns indexes of segments started."""
+        self.last_active = time.monotonic()
+        self.words.extend(text.split())
+        started = []
+        while self.words:
+            cut = self._cut_point(final)
+            if cut is None:
+                break
+            seg_words, self.words = self.words[:cut], self.words[cut:]
+            started.append(self._start_segment(seg_words))
+        return started
+
+    def _cut_point(self, final: bool) -> Optional[int]:
+        n = len(self.words)
+        if n >= SEGMENT_MAX_WORDS:
+            # Prefer the last sentence end past MIN_WORDS, else hard cut
+            for i in range(SEGMENT_MAX_WORDS, SEGMENT_MIN_WORDS - 1, -1):
+                if _SENTENCE_END.search(self.words[i - 1]):
+                    return i
+            return SEGMENT_MAX_WORDS
+        if n >= SEGMENT_MIN_WORDS and _SENTENCE_END.search(self.words[-1]):
+            return n
+        if final:
+            return n
+        return None
+
+    def _start_segment(self, seg_words: List[str]) -> int:
+        index = self.next_index
+        self.next_index += 1
+        text = " ".join(seg_words)
+        context = " ".join(self.prev_tail + seg_words)
+        self.prev_tail = seg_words[-CONTEXT_TAIL_WORDS:]
+        segment = {"index": index, "text": text, "prompt": context, "questions": None}
+        self.segments.append(segment)
+        del self.segments[:-MAX_KEPT_SEGMENTS]
+        task = asyncio.get_running_loop().create_task(self._generate(segment))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return index
+
+    async def _generate(self, segment: dict):
+        self.upstream_calls += 1
+        try:
+            questions = await self.generate(segment["prompt"])
+        except Exception as e:
+            print(f"Lecture {self.id}: question generation failed for segment {segment['index']}: {e}")
+            self._broadcast({"type": "error", "segment": segment["index"], "detail": str(e)})
+            return
+        segment["questions"] = questions
+        payload = {
+            "type": "questions",
+            "segment": segment["index"],
+            "prompt": segment["prompt"],
+            "questions": questions,
+            "ts_ms": int(time.time() * 1000),
+        }
+        # Out-of-order completions never replace a newer segment's questions
+        if self.latest is None or segment["index"] > self.latest["segment"]:
+            self.latest = payload
+            self._broadcast(payload)
+
+    # ---- subscribers ----
+    def subscribe(self) -> asyncio.Queue:
+        q: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        if self.latest is not None:
+            q.put_nowait(self.latest)
+        self.subscribers.add(q)
+        return q
+
+    def unsubscribe(self, q: asyncio.Queue):
+        self.subscribers.discard(q)
+
+    def _broadcast(self, payload: dict):
+        for q in self.subscribers:
+            if q.full():
+                # Slow student: drop their oldest pending update
+                q.get_nowait()
+            q.put_nowait(payload)
+
+    def info(self) -> dict:
+        return {
+            "lecture_id": self.id,
+            "subscribers": len(self.subscribers),
+            "segments": self.next_index,
+            "pending_words": len(self.words),
+            "upstream_calls": self.upstream_calls,
+        }
+
+
+_lectures: Dict[str, Lecture] = {}
+
+
+def create_lecture(generate: Callable[[str], Awaitable[List[str]]]) -> Lecture:
+    _expire_idle()
+    lecture = Lecture(generate)
+    _lectures[lecture.id] = lecture
+    return lecture
+
+
+def get_lecture(lecture_id: str) -> Optional[Lecture]:
+    _expire_idle()
+    return _lectures.get(lecture_id)
+
+
+def end_lecture(lecture_id: str):
+    lecture = _lectures.pop(lecture_id, None)
+    if lecture is not None:
+        # Queued and in-flight generations would hold scheduler slots and
+        # token budget for questions nobody receives
+        for task in list(lecture._tasks):
+            task.cancel()
+        lecture._broadcast({"type": "ended"})
+
+
+def _expire_idle():
+    # A lecture with no transcript for the TTL is over, even if students are
+    # still connected: end it so their sockets close too
+    now = time.monotonic()
+    for lid, lecture in list(_lectures.items()):
+        if now - lecture.last_active > LECTURE_IDLE_TTL_S:
+            end_lecture(lid)
@@ -0,0 +1,145 @@
+"""Question generation that follows a transcript while it is still being spoken.
+
+The client streams transcript deltas: newly finalised text plus the
+current interim hypothesis, which replaces the previous one. The server
+decides when to generate:
+
+  - debounce: wait until the transcript has been quiet for DEBOUNCE_S,
+    but never delay a pending change longer than MAX_WAIT_S (continuous
+    speech would otherwise never settle);
+  - change threshold: skip if fewer than MIN_CHANGED_WORDS words differ
+    from the text the current questions were generated for;
+  - supersede: a new generation cancels the one in flight (a call still
+    queued for admission never reaches the model), and a result that
+    arrives for an older version is dropped.
+
+`done` (the user stopped talking) skips the debounce. If the newest set
+(sent or in flight) is within the change threshold it becomes the final
+one; otherwise a last generation starts immediately. `generate` is told
+which generations are final: the student is waiting on those.
+"""
+import asyncio
+import time
+from typing import Awaitable, Callable, List, Optional
+
+from services import metrics
+
+DEBOUNCE_S = 0.6
+MAX_WAIT_S = 2.5
+MIN_WORDS = 6
+MIN_CHANGED_WORDS = 5
+
+
+def changed_words(old: List[str], new: List[str]) -> int:
+    """Words of `new` past its common prefix with `old` (interim STT only rewrites the tail)."""
+    common = 0
+    for a, b in zip(old, new):
+        if a.lower() != b.lower():
+            break
+        common += 1
+    return max(len(new), len(old)) - common
+
+
+class LiveQuestions:
+    def __init__(self, generate: Callable[[str, bool], Awaitable[List[str]]],
+                 send: Callable[[dict], Awaitable[None]]):
+        self.generate = generate
+        self.send = send
+        self.final_words: List[str] = []
+        self.interim_words: List[str] = []
+        self.generated_words: List[str] = []  # text behind the newest started generation
+        self.version = 0
+        self.done = False
+        self._last: Optional[dict] = None  # prompt + questions of the newest sent set
+        self._pending_since: Optional[float] = None
+        self._timer: Optional[asyncio.Task] = None
+        self._inflight: Optional[asyncio.Task] = None
+
+    def words(self) -> List[str]:
+        return self.final_words + self.interim_words
+
+    # ---- input ----
+    def feed(self, final: str = "", interim: Optional[str] = None, done: bool = False):
+        """Applies one delta and (re)arms the debounce timer."""
+        self.final_words.extend(final.split())
+        if interim is not None:
+            self.interim_words = interim.split()
+        if done:
+            self.interim_words = []
+        self.done = done
+
+        now = time.monotonic()
+        if self._pending_since is None:
+            self._pending_since = now
+        delay = 0.0 if done else min(DEBOUNCE_S, self._pending_since + MAX_WAIT_S - now)
+        self._cancel(self._timer)
+        self._timer = asyncio.get_running_loop().create_task(self._fire(max(0.0, delay)))
+
+    async def _fire(self, delay: float):
+        await asyncio.sleep(delay)
+        self._pending_since = None
+        self._maybe_generate()
+
+    def _maybe_generate(self):
+        words = self.words()
+        final = self.done
+        if len(words) < MIN_WORDS and not (final and words):
+            return
+        if self.version and changed_words(self.generated_words, words) < MIN_CHANGED_WORDS:
+            idle = self._inflight is None or self._inflight.done()
+            if final and idle and self._last is not None:
+                # The last set already covers (nearly) everything: confirm it
+                # as final instead of making the student wait for a new one
+                self._inflight = asyncio.get_running_loop().create_task(self._confirm_final())
+            metrics.LIVE_QUESTIONS.labels("skipped").inc()
+            return
+
+        if self._inflight is not None and not self._inflight.done():
+            metrics.LIVE_QUESTIONS.labels("superseded").inc()
+        self._cancel(self._inflight)
+        self.version += 1
+        self.generated_words = words
+        metrics.LIVE_QUESTIONS.labels("started").inc()
+        self._inflight = asyncio.get_running_loop().create_task(
+            self._generate(self.version, " ".join(words), final))
+
+    async def _generate(self, version: int, prompt: str, final: bool):
+        try:
+            # Cancelling drops a queued call; one already running upstream
+            # can't be interrupted, so its late result is discarded below.
+            questions = await self.generate(prompt, final)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Live questions: generation failed: {e}")
+            metrics.LIVE_QUESTIONS.labels("failed").inc()
+            if version == self.version:
+                await self.send({"type": "error", "version": version, "detail": str(e)})
+            return
+        if version != self.version:
+            return
+        self._last = {"prompt": prompt, "questions": questions}
+        metrics.LIVE_QUESTIONS.labels("sent").inc()
+        await self.send({
+            "type": "questions",
+            "version": version,
+            "prompt": prompt,
+            "questions": questions,
+            # `done` may have arrived while this was in flight
+            "final": self.done,
+            "ts_ms": int(time.time() * 1000),
+        })
+
+    async def _confirm_final(self):
+        await self.send({"type": "questions", "version": self.version, **self._last,
+                         "final": True, "ts_ms": int(time.time() * 1000)})
+
+    # ---- teardown ----
+    @staticmethod
+    def _cancel(task: Optional[asyncio.Task]):
+        if task is not None and not task.done():
+            task.cancel()
+
+    def close(self):
+        self._cancel(self._timer)
+        self._cancel(self._inflight)
@@ -0,0 +1,279 @@
+"""Admission control for upstream model calls.
+
+Every model call goes through one per-process scheduler:
+
+  - at most LLM_MAX_CONCURRENCY calls in flight;
+  - a token bucket refilled at LLM_TOKENS_PER_MIN, holding at most
+    BURST_S seconds of budget (providers enforce per-minute limits over
+    shorter windows). A call reserves
+    prompt chars / 4 + max_tokens (providers count max_tokens against the
+    limit up front); the prompt part is corrected from the response's usage;
+  - waiters are served interactive first (a student waiting on screen),
+    then background (follow-ups, prefetch, lecture/live sets), oldest
+    deadline first within a priority;
+  - a call that can't start before its deadline is rejected up front,
+    not after sitting in the queue; when the queue is full a background
+    waiter is evicted to make room for an interactive one;
+  - a 429 from the provider empties the bucket (everyone backs off) and
+    the call is retried with full-jitter exponential backoff, honouring
+    Retry-After, while the deadline allows. Each retry takes its tokens
+    from the bucket again.
+
+Waiting happens on the event loop; the blocking client call runs on the
+scheduler's own thread pool (one thread per slot), so a full queue never
+stalls other requests or the default executor.
+"""
+import asyncio
+import heapq
+import itertools
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from services import metrics
+
+INTERACTIVE = 0
+BACKGROUND = 1
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BACKGROUND: "background"}
+
+MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+TOKENS_PER_MIN = float(os.getenv("LLM_TOKENS_PER_MIN", "200000"))
+MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", "64"))
+BURST_S = 10.0
+
+MAX_RETRIES = 4
+BACKOFF_BASE_S = 0.5
+BACKOFF_MAX_S = 8.0
+
+
+class Rejected(Exception):
+    """The call was not (or could not be) made in time; retry after `retry_after_s`."""
+
+    def __init__(self, reason: str, retry_after_s: float = 1.0):
+        super().__init__(f"Model call rejected: {reason}")
+        self.reason = reason
+        self.retry_after_s = retry_after_s
+
+
+def estimate_tokens(messages, max_tokens: int) -> int:
+    chars = sum(len(m.get("content", "")) for m in messages)
+    return chars // 4 + max_tokens
+
+
+def _is_rate_limit(e: Exception) -> bool:
+    return getattr(e, "http_status", None) == 429 or type(e).__name__ == "RateLimitError"
+
+
+def _retry_after(e: Exception) -> Optional[float]:
+    headers = getattr(e, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after") or headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    def __init__(self, per_min: float, burst_s: float = BURST_S):
+        self.rate = per_min / 60.0
+        self.capacity = self.rate * burst_s
+        self.tokens = self.capacity
+        self._t = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self._t) * self.rate)
+        self._t = now
+
+    def wait_time(self, n: float, now: float) -> float:
+        """Seconds until `n` tokens are available (0 if they are now)."""
+        self._refill(now)
+        n = min(n, self.capacity)
+        return 0.0 if self.tokens >= n else (n - self.tokens) / self.rate
+
+    def take(self, n: float):
+        self.tokens -= min(n, self.capacity)
+
+    def adjust(self, n: float):
+        """Gives back (n > 0) or charges (n < 0) the difference to the estimate."""
+        self.tokens = min(self.capacity, self.tokens + n)
+
+    def drain(self):
+        self.tokens = min(self.tokens, 0.0)
+
+
+class _Waiter:
+    __slots__ = ("priority", "deadline", "tokens", "future", "enqueued")
+
+    def __init__(self, priority, deadline, tokens, future):
+        self.priority = priority
+        self.deadline = deadline
+        self.tokens = tokens
+        self.future = future
+        self.enqueued = time.monotonic()
+
+
+class LLMScheduler:
+    def __init__(self, max_concurrency: int = MAX_CONCURRENCY,
+                 tokens_per_min: float = TOKENS_PER_MIN, max_queue: int = MAX_QUEUE):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.bucket = TokenBucket(tokens_per_min)
+        self.running = 0
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="llm_call")
+        self._heap = []  # (priority, deadline, seq, waiter)
+        self._seq = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    # ---- queue ----
+    def _reject(self, waiter: _Waiter, reason: str, retry_after_s: float = 1.0):
+        metrics.LLM_REJECTED.labels(PRIORITY_NAMES[waiter.priority], reason).inc()
+        if not waiter.future.done():
+            waiter.future.set_exception(Rejected(reason, retry_after_s))
+
+    def _forget(self, waiter: _Waiter):
+        """Takes a waiter that gave up out of the queue, so it stops holding a place."""
+        for i, e in enumerate(self._heap):
+            if e[3] is waiter:
+                self._heap.pop(i)
+                heapq.heapify(self._heap)
+                break
+        metrics.LLM_QUEUE_DEPTH.set(len(self._heap))
+
+    def _push(self, waiter: _Waiter):
+        if len(self._heap) >= self.max_queue:
+            # Waiters whose caller went away don't count
+            self._heap = [e for e in self._heap if not e[3].future.done()]
+            heapq.heapify(self._heap)
+        if len(self._heap) >= self.max_queue:
+            # Evict the background waiter with the latest deadline, if any
+            victims = [e for e in self._heap if e[0] == BACKGROUND]
+            if waiter.priority == BACKGROUND or not victims:
+                self._reject(waiter, "queue_full")
+                return
+            victim = max(victims, key=lambda e: e[1])
+            self._heap.remove(victim)
+            heapq.heapify(self._heap)
+            self._reject(victim[3], "evicted")
+        heapq.heappush(self._heap, (waiter.priority, waiter.deadline, next(self._seq), waiter))
+        metrics.LLM_QUEUE_DEPTH.set(len(self._heap))
+
+    def _dispatch(self):
+        """Admits waiters while a slot and enough budget are free."""
+        self._timer = None
+        now = time.monotonic()
+        while self._heap and self.running < self.max_concurrency:
+            waiter = self._heap[0][3]
+            if waiter.future.done():  # caller went away
+                heapq.heappop(self._heap)
+                continue
+            wait = self.bucket.wait_time(waiter.tokens, now)
+            if now + wait > waiter.deadline:
+                heapq.heappop(self._heap)
+                self._reject(waiter, "deadline", max(wait, 1.0))
+                continue
+            if wait > 0:
+                # Head of line waits for budget; lower priorities wait behind it
+                self._timer = asyncio.get_running_loop().call_later(wait, self._dispatch)
+                break
+            heapq.heappop(self._heap)
+            self.bucket.take(waiter.tokens)
+            self.running += 1
+            metrics.LLM_IN_FLIGHT.set(self.running)
+            metrics.LLM_QUEUE_WAIT_SECONDS.labels(PRIORITY_NAMES[waiter.priority]).observe(now - waiter.enqueued)
+            waiter.future.set_result(None)
+        metrics.LLM_QUEUE_DEPTH.set(len(self._heap))
+
+    def _kick(self):
+        if self._timer is not None:
+            self._timer.cancel()
+        self._dispatch()
+
+    async def _admit(self, priority: int, deadline: float, tokens: int):
+        waiter = _Waiter(priority, deadline, tokens, asyncio.get_running_loop().create_future())
+        self._push(waiter)
+        self._kick()
+        fut = waiter.future
+        try:
+            await asyncio.wait_for(asyncio.shield(fut), max(0.0, deadline - time.monotonic()))
+        except asyncio.TimeoutError:
+            if fut.done() and not fut.exception():
+                return  # admitted just as the deadline passed
+            fut.cancel()
+            self._forget(waiter)
+            self._kick()
+            self._reject(waiter, "deadline")
+            raise Rejected("deadline")
+        except asyncio.CancelledError:
+            # Caller gave up (client gone, live set superseded); hand back
+            # the slot if we had already been admitted.
+            if fut.done() and not fut.cancelled() and not fut.exception():
+                self._release()
+            else:
+                fut.cancel()
+                self._forget(waiter)
+                self._kick()
+            raise
+
+    def _release(self):
+        self.running -= 1
+        metrics.LLM_IN_FLIGHT.set(self.running)
+        self._kick()
+
+    # ---- calls ----
+    async def run(self, fn: Callable[[], Any], *, priority: int, tokens: int,
+                  timeout_s: float, max_tokens: int = 0) -> Any:
+        """Runs blocking `fn` in a worker thread once admitted; retries 429s."""
+        deadline = time.monotonic() + timeout_s
+        await self._admit(priority, deadline, tokens)
+        try:
+            for attempt in range(MAX_RETRIES + 1):
+                try:
+                    result = await asyncio.get_running_loop().run_in_executor(self._executor, fn)
+                except Exception as e:
+                    if not _is_rate_limit(e):
+                        raise
+                    self.bucket.drain()
+                    delay = _retry_after(e) or random.uniform(0, min(BACKOFF_MAX_S, BACKOFF_BASE_S * 2 ** attempt))
+                    if attempt == MAX_RETRIES or time.monotonic() + delay > deadline:
+                        metrics.LLM_REJECTED.labels(PRIORITY_NAMES[priority], "rate_limited").inc()
+                        raise Rejected("rate_limited", delay) from e
+                    metrics.LLM_RETRIES.inc()
+                    await asyncio.sleep(delay)
+                    await self._retake(priority, deadline, tokens)
+                    continue
+                self._reconcile(result, tokens, max_tokens)
+                return result
+        finally:
+            self._release()
+
+    async def _retake(self, priority: int, deadline: float, tokens: int):
+        """Charges the bucket for a retry, waiting for budget while the deadline allows."""
+        while True:
+            now = time.monotonic()
+            wait = self.bucket.wait_time(tokens, now)
+            if wait <= 0:
+                self.bucket.take(tokens)
+                return
+            if now + wait > deadline:
+                metrics.LLM_REJECTED.labels(PRIORITY_NAMES[priority], "rate_limited").inc()
+                raise Rejected("rate_limited", wait)
+            await asyncio.sleep(wait)
+
+    def _reconcile(self, result, estimated: int, max_tokens: int):
+        try:
+            charged = result["usage"]["prompt_tokens"] + max_tokens
+        except (KeyError, TypeError):
+            return
+        self.bucket.adjust(estimated - charged)
+
+    def status(self) -> dict:
+        return {
+            "running": self.running,
+            "queued": len(self._heap),
+            "max_concurrency": self.max_concurrency,
+            "tokens_available": int(self.bucket.tokens),
+        }
+
+
+scheduler = LLMScheduler()
@@ -0,0 +1,229 @@
+"""Minimal in-process metrics rendered in Prometheus text exposition format.
+
+Kept dependency-free and cheap enough to call on every gaze frame:
+an observation is a bisect plus a couple of integer adds under a lock.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Tuple
+
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+_registry: List["_Family"] = []
+_registry_lock = threading.Lock()
+
+
+def _fmt_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{v}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Counter:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+
+class _Gauge(_Counter):
+    __slots__ = ()
+
+    def dec(self, amount: float = 1.0):
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float):
+        self.value = value
+
+
+class _Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count", "_lock")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+            self.count += 1
+
+    @contextmanager
+    def time(self):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0)
+
+
+class _Family:
+    kind = ""
+
+    def __init__(self, name: str, doc: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.doc = doc
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._children[()] = self._default = self._new()
+        with _registry_lock:
+            _registry.append(self)
+
+    def _new(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new())
+        return child
+
+    def render(self) -> List[str]:
+        out = [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} {self.kind}"]
+        for key, child in sorted(self._children.items()):
+            out.extend(self._render_child(key, child))
+        return out
+
+    def _render_child(self, key, child) -> List[str]:
+        return [f"{self.name}{_fmt_labels(self.labelnames, key)} {child.value}"]
+
+
+class Counter(_Family):
+    kind = "counter"
+
+    def _new(self):
+        return _Counter()
+
+    def inc(self, amount: float = 1.0):
+        self._default.inc(amount)
+
+
+class Gauge(_Family):
+    kind = "gauge"
+
+    def _new(self):
+        return _Gauge()
+
+    def inc(self, amount: float = 1.0):
+        self._default.inc(amount)
+
+    def dec(self, amount: float = 1.0):
+        self._default.dec(amount)
+
+    def set(self, value: float):
+        self._default.set(value)
+
+
+class Histogram(_Family):
+    kind = "histogram"
+
+    def __init__(self, name: str, doc: str, labelnames: Iterable[str] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, doc, labelnames)
+
+    def _new(self):
+        return _Histogram(self.buckets)
+
+    def observe(self, value: float):
+        self._default.observe(value)
+
+    def time(self):
+        return self._default.time()
+
+    def _render_child(self, key, child) -> List[str]:
+        with child._lock:
+            counts, total, n = list(child.counts), child.sum, child.count
+        out = []
+        cum = 0
+        for bound, c in zip(self.buckets + (float("inf"),), counts):
+            cum += c
+            le = 'le="%s"' % ("+Inf" if bound == float("inf") else repr(bound))
+            out.append(f"{self.name}_bucket{_fmt_labels(self.labelnames, key, le)} {cum}")
+        lbl = _fmt_labels(self.labelnames, key)
+        out.append(f"{self.name}_sum{lbl} {total}")
+        out.append(f"{self.name}_count{lbl} {n}")
+        return out
+
+
+def render_latest() -> str:
+    with _registry_lock:
+        families = list(_registry)
+    lines: List[str] = []
+    for fam in families:
+        lines.extend(fam.render())
+    return "\n".join(lines) + "\n"
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# -------------------------
+# Backend metrics
+# -------------------------
+GAZE_STAGE_SECONDS = Histogram(
+    "gaze_stage_seconds", "Per-frame gaze pipeline stage latency.", ["stage"]
+)
+READ_WAIT_SECONDS = Histogram(
+    "gaze_read_wait_seconds",
+    "Time blocked in the capture source's read() until the next frame (idle, not pipeline work).",
+)
+WS_SEND_SECONDS = Histogram("gaze_ws_send_seconds", "Time to send one gaze WS message.")
+OPENAI_CALL_SECONDS = Histogram(
+    "openai_call_seconds", "Upstream model call latency per route.", ["route"]
+)
+
+FRAMES_TOTAL = Counter("gaze_frames_total", "Frames read from the capture source.")
+FRAMES_DROPPED = Counter("gaze_frames_dropped_total", "Capture reads that gave no usable frame (read failed or processing raised).")
+FRAMES_FACE_LOST = Counter("gaze_frames_face_lost_total", "Frames with no face in the latest result.")
+CACHE_HITS = Counter(
+    "gaze_cache_hits_total", "Reused results instead of fresh computation.", ["cache"]
+)
+RESULT_REUSED = CACHE_HITS.labels("detector_result")
+ACTIVE_SESSIONS = Gauge("gaze_ws_active_sessions", "Currently connected gaze WebSocket clients.")
+LIVE_QUESTIONS = Counter(
+    "live_questions_total", "Live question generations by outcome.", ["outcome"]
+)
+LLM_QUEUE_WAIT_SECONDS = Histogram(
+    "llm_queue_wait_seconds", "Time a model call waited for admission.", ["priority"]
+)
+LLM_REJECTED = Counter(
+    "llm_rejected_total", "Model calls refused by admission control.", ["priority", "reason"]
+)
+LLM_RETRIES = Counter("llm_retries_total", "Model calls retried after a provider 429.")
+LLM_IN_FLIGHT = Gauge("llm_in_flight", "Model calls currently running.")
+LLM_QUEUE_DEPTH = Gauge("llm_queue_depth", "Model calls waiting for admission.")
+
+# Stage children resolved once so the hot loop skips the label lookup.
+# "capture" is the work on a frame once read() returns; the wait for it is READ_WAIT_SECONDS
+STAGE_CAPTURE = GAZE_STAGE_SECONDS.labels("capture")
+STAGE_SUBMIT = GAZE_STAGE_SECONDS.labels("submit")
+STAGE_INFERENCE = GAZE_STAGE_SECONDS.labels("inference")
+STAGE_FEATURES = GAZE_STAGE_SECONDS.labels("features")
+STAGE_MAPPING = GAZE_STAGE_SECONDS.labels("mapping")
+
+
+def observe_since(hist, t0: float) -> float:
+    """Observes perf_counter() - t0 and returns the new timestamp."""
+    now = time.perf_counter()
+    hist.observe(now - t0)
+    return now
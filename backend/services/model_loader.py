@@ -0,0 +1,111 @@
+"""Loads the FaceLandmarker model once, off the request path.
+
+mediapipe and cv2 are only imported here (and in the gaze thread), so
+workers that only serve the OpenAI routes never pay for them. Progress is
+exposed through `status()` for the /health endpoint.
+"""
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+MODEL_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "face_landmarker.task"))
+WARMUP_TIMEOUT_S = 10.0
+
+_PROCESS_START = time.monotonic()
+
+_lock = threading.Lock()
+_detector = None
+_status: Dict[str, Any] = {
+    "state": "idle",        # idle -> loading -> warming -> ready | error; closed when the gaze thread exits
+    "error": None,
+    "import_ms": None,
+    "load_ms": None,
+    "warmup_ms": None,
+    "ready_after_ms": None,  # since process start
+}
+
+
+def _ms(t0: float) -> int:
+    return int((time.monotonic() - t0) * 1000)
+
+
+def uptime_ms() -> int:
+    return _ms(_PROCESS_START)
+
+
+def status() -> Dict[str, Any]:
+    return dict(_status)
+
+
+def is_ready() -> bool:
+    return _status["state"] == "ready"
+
+
+def get_detector(result_callback: Callable) -> Optional[Any]:
+    """Returns the shared LIVE_STREAM detector, loading and warming it on first use.
+
+    Blocks the calling thread (the gaze thread) while loading; returns None
+    if the model could not be loaded.
+    """
+    global _detector
+    with _lock:
+        if _detector is not None or _status["state"] == "error":
+            return _detector
+        try:
+            _detector = _load(result_callback)
+        except Exception as e:
+            _status.update(state="error", error=str(e))
+            print(f"FaceLandmarker load failed: {e}")
+        return _detector
+
+
+def _load(result_callback: Callable):
+    _status["state"] = "loading"
+    t0 = time.monotonic()
+    import numpy as np
+    import mediapipe as mp
+    _status["import_ms"] = _ms(t0)
+
+    t0 = time.monotonic()
+    warmed = threading.Event()
+    warmup_ts_ms = int(time.time() * 1000)
+
+    def _callback(result, output_image, timestamp_ms):
+        # The warm-up frame's result is ours; only real frames reach the tracker
+        if timestamp_ms == warmup_ts_ms:
+            warmed.set()
+            return
+        result_callback(result, output_image, timestamp_ms)
+
+    options = mp.tasks.vision.FaceLandmarkerOptions(
+        base_options=mp.tasks.BaseOptions(model_asset_path=MODEL_PATH),
+        running_mode=mp.tasks.vision.RunningMode.LIVE_STREAM,
+        output_facial_transformation_matrixes=True,
+        result_callback=_callback,
+    )
+    detector = mp.tasks.vision.FaceLandmarker.create_from_options(options)
+    _status["load_ms"] = _ms(t0)
+
+    # One synthetic frame through the graph so the first real frame doesn't
+    # pay for delegate/graph initialisation.
+    _status["state"] = "warming"
+    t0 = time.monotonic()
+    blank = np.zeros((480, 640, 3), dtype=np.uint8)
+    detector.detect_async(mp.Image(image_format=mp.ImageFormat.SRGB, data=blank), warmup_ts_ms)
+    if not warmed.wait(WARMUP_TIMEOUT_S):
+        print("FaceLandmarker warm-up timed out; continuing anyway")
+    _status["warmup_ms"] = _ms(t0)
+
+    _status.update(state="ready", ready_after_ms=uptime_ms())
+    return detector
+
+
+def close():
+    """Closes the detector; called by the gaze thread on its way out."""
+    global _detector
+    with _lock:
+        if _detector is not None:
+            _detector.close()
+            _detector = None
+            _status["state"] = "closed"
@@ -0,0 +1,34 @@
+"""Frame preprocessing for FaceLandmarker.
+
+Camera frames arrive as BGR; MediaPipe's SRGB format expects RGB. The
+conversion is written into preallocated buffers instead of allocating a
+new image per frame, and the selfie-view mirror is applied to landmark
+coordinates afterwards (see gaze_features, mirror=True) rather than by
+flipping pixels.
+"""
+import numpy as np
+
+# Detection is asynchronous (LIVE_STREAM), so alternate between buffers to
+# never overwrite an image the detector may still be reading.
+NUM_BUFFERS = 2
+
+
+class FramePreprocessor:
+    def __init__(self, num_buffers: int = NUM_BUFFERS):
+        self.num_buffers = num_buffers
+        self._buffers = []
+        self._i = 0
+
+    def _ensure(self, shape):
+        if not self._buffers or self._buffers[0].shape != shape:
+            self._buffers = [np.empty(shape, dtype=np.uint8) for _ in range(self.num_buffers)]
+            self._i = 0
+
+    def __call__(self, frame: np.ndarray) -> np.ndarray:
+        """BGR uint8 frame -> RGB frame in one of the reusable buffers."""
+        import cv2
+        self._ensure(frame.shape)
+        buf = self._buffers[self._i]
+        self._i = (self._i + 1) % self.num_buffers
+        cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=buf)
+        return buf
@@ -0,0 +1,125 @@
+"""Sampling profiler and slow-frame log for diagnosing the live backend.
+
+`sample_profile` walks `sys._current_frames()` from the calling thread, so it
+sees every Python thread (gaze_loop daemon, the event loop, threadpool
+workers) without instrumenting them. Output is collapsed-stack text
+("thread;outer;...;inner count"), the input format of flamegraph.pl and
+speedscope.
+"""
+import heapq
+import itertools
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+MAX_PROFILE_SECONDS = 30.0
+MAX_SAMPLE_HZ = 1000
+
+_profile_lock = threading.Lock()
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{code.co_firstlineno})"
+
+
+def _stack(frame) -> str:
+    parts = []
+    while frame is not None:
+        parts.append(_frame_label(frame))
+        frame = frame.f_back
+    parts.reverse()
+    return ";".join(parts)
+
+
+def sample_profile(seconds: float = 5.0, hz: int = 100, include_idle: bool = False) -> str:
+    """Samples all threads for `seconds` and returns collapsed stacks.
+
+    Only one profile runs at a time; a concurrent call raises RuntimeError.
+    """
+    seconds = min(max(seconds, 0.1), MAX_PROFILE_SECONDS)
+    interval = 1.0 / min(max(hz, 1), MAX_SAMPLE_HZ)
+    if not _profile_lock.acquire(blocking=False):
+        raise RuntimeError("A profile is already running")
+
+    try:
+        me = threading.get_ident()
+        counts: Counter = Counter()
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = _stack(frame)
+                if not include_idle and _is_idle(stack):
+                    continue
+                counts[f"{names.get(ident, ident)};{stack}"] += 1
+            time.sleep(interval)
+    finally:
+        _profile_lock.release()
+
+    return "".join(f"{stack} {n}\n" for stack, n in counts.most_common())
+
+
+# Leaf frames that only mean "waiting": dropped so the flame graph shows work.
+# "wait (capture.py" is _Paced.wait sleeping until a replay/synthetic frame is due.
+_IDLE_LEAVES = (
+    "wait (threading.py", "select (selectors.py", "_worker (thread.py", "get (queue.py",
+    "wait (capture.py",
+)
+
+
+def _is_idle(stack: str) -> bool:
+    leaf = stack.rsplit(";", 1)[-1]
+    return leaf.startswith(_IDLE_LEAVES)
+
+
+class SlowFrameLog:
+    """Keeps the N slowest gaze frames with their per-stage breakdown.
+
+    Recording is a single heap push/replace on a bounded heap, cheap enough
+    to stay on for every frame.
+    """
+
+    def __init__(self, size: int = 20):
+        self.size = size
+        self._heap: List[tuple] = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        # Total a frame must beat to get in; only changed under _lock, so the
+        # unlocked check never sees a heap that clear() is emptying
+        self._floor = -1.0
+
+    def record(self, stages: Dict[str, float], ts_ms: Optional[int] = None):
+        total = sum(stages.values())
+        if total <= self._floor:
+            return
+        item = (total, next(self._seq), ts_ms or int(time.time() * 1000), stages)
+        with self._lock:
+            heap = self._heap
+            if len(heap) < self.size:
+                heapq.heappush(heap, item)
+            else:
+                heapq.heappushpop(heap, item)
+            if len(heap) >= self.size:
+                self._floor = heap[0][0]
+
+    def top(self) -> List[dict]:
+        with self._lock:
+            items = sorted(self._heap, reverse=True)
+        return [
+            {"total_ms": round(total * 1000, 3), "ts_ms": ts,
+             "stages_ms": {k: round(v * 1000, 3) for k, v in stages.items()}}
+            for total, _, ts, stages in items
+        ]
+
+    def clear(self):
+        with self._lock:
+            self._heap.clear()
+            self._floor = -1.0
+
+
+slow_frames = SlowFrameLog()
@@ -0,0 +1,194 @@
+"""Gaze state shared across uvicorn worker processes.
+
+With GAZE_SHARED=1, exactly one worker (the producer) runs the gaze thread.
+It is elected by an exclusive flock on a lock file, and the lock is freed
+when that process dies. The producer writes every snapshot into a small
+shared-memory segment. Any worker can serve /gaze/ws by reading from that
+segment, so camera/inference work is never duplicated.
+
+Segment layout: a header, then one fixed-size record protected by a
+seqlock. The writer makes the counter odd, writes the fields, then makes
+it even again (2 * snapshot.seq). Readers retry while the counter is odd
+or changed mid-read. The segment is never unlinked, so a newly elected
+producer overwrites the record at once (see gaze_tracker._become_producer).
+
+Calibration commands from non-producer workers are forwarded to the
+producer over a Unix socket (multiprocessing.connection). Connections are
+authenticated with a random key that the first worker writes to a 0600
+key file next to the lock file, so other local users can't drive the
+producer or feed it pickles.
+"""
+import os
+import secrets
+import stat
+import struct
+import tempfile
+import threading
+from multiprocessing import resource_tracker, shared_memory
+from multiprocessing.connection import Client, Listener
+from typing import Callable, Optional
+
+DEFAULT_NAME = "aeyes_gaze2"
+
+_HEADER = struct.Struct("<4sI")          # magic, producer pid
+# seqlock, x, y, calibrated, blink, ts_ms, capture_ts_ms, px, py, vx, vy
+_RECORD = struct.Struct("<Qdd??6xqqdddd")
+_SEQ = struct.Struct("<Q")
+_MAGIC = b"GAZ2"
+_SIZE = _HEADER.size + _RECORD.size
+_READ_RETRIES = 100
+_KEY_BYTES = 32
+
+
+def _paths(name: str):
+    base = os.path.join(tempfile.gettempdir(), name)
+    return base + ".lock", base + ".sock", base + ".key"
+
+
+def _load_authkey(path: str) -> bytes:
+    """The workers' shared command-socket key, created by whichever worker comes first."""
+    if not os.path.exists(path):
+        # Written under a unique name and linked into place, so the key
+        # file never exists half-written and only one worker's key wins
+        tmp = f"{path}.{os.getpid()}"
+        fd = os.open(tmp, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o600)
+        try:
+            os.write(fd, secrets.token_bytes(_KEY_BYTES))
+        finally:
+            os.close(fd)
+        try:
+            os.link(tmp, path)
+        except FileExistsError:
+            pass
+        finally:
+            os.unlink(tmp)
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        st = os.fstat(fd)
+        # The temp dir is shared: refuse a key someone else planted or can read
+        if st.st_uid != os.getuid() or stat.S_IMODE(st.st_mode) & 0o077:
+            raise PermissionError(f"{path} must be owned by this user with mode 0600")
+        key = os.read(fd, _KEY_BYTES + 1)
+    finally:
+        os.close(fd)
+    if len(key) != _KEY_BYTES:
+        raise PermissionError(f"{path} is not a gaze command key")
+    return key
+
+
+class SharedGazeState:
+    def __init__(self, name: str = DEFAULT_NAME):
+        self.name = name
+        self.lock_path, self.sock_path, self.key_path = _paths(name)
+        self._authkey = _load_authkey(self.key_path)
+        try:
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=_SIZE)
+        except FileExistsError:
+            self._shm = shared_memory.SharedMemory(name=name)
+        # The segment outlives any one worker (a new producer may take over),
+        # so don't let this process's resource tracker unlink it on exit.
+        resource_tracker.unregister(self._shm._name, "shared_memory")
+        self._buf = self._shm.buf
+        self._lock_fd = None
+        self._cache: Optional[tuple] = None
+
+    # ---- election ----
+    def try_become_producer(self) -> bool:
+        import fcntl  # POSIX only; shared mode isn't available on Windows
+        fd = os.open(self.lock_path, os.O_CREAT | os.O_RDWR, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._claim(fd)
+        return True
+
+    def wait_to_become_producer(self, on_elected: Callable[[], None]):
+        """Blocks a daemon thread on the lock; runs `on_elected` if the producer dies."""
+        import fcntl
+
+        def _wait():
+            fd = os.open(self.lock_path, os.O_CREAT | os.O_RDWR, 0o600)
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            self._claim(fd)
+            print(f"Gaze producer taken over by pid {os.getpid()}")
+            on_elected()
+        threading.Thread(target=_wait, name="gaze_producer_election", daemon=True).start()
+
+    def _claim(self, fd):
+        self._lock_fd = fd
+        _HEADER.pack_into(self._buf, 0, _MAGIC, os.getpid())
+
+    @property
+    def is_producer(self) -> bool:
+        return self._lock_fd is not None
+
+    # ---- record ----
+    def write(self, snap):
+        """Producer only. `snap` is a gaze_tracker.GazeSnapshot."""
+        off = _HEADER.size
+        _SEQ.pack_into(self._buf, off, 2 * snap.seq - 1)
+        _RECORD.pack_into(self._buf, off, 2 * snap.seq - 1, *snap[:-1])
+        _SEQ.pack_into(self._buf, off, 2 * snap.seq)
+
+    def read(self) -> Optional[tuple]:
+        """GazeSnapshot fields as a tuple (seq last), or None if no consistent read."""
+        off = _HEADER.size
+        buf = self._buf
+        for _ in range(_READ_RETRIES):
+            (lock,) = _SEQ.unpack_from(buf, off)
+            if lock & 1:
+                continue
+            cached = self._cache
+            if cached is not None and cached[-1] == lock >> 1:
+                return cached
+            rec = _RECORD.unpack_from(buf, off)
+            if rec[0] != lock or _SEQ.unpack_from(buf, off)[0] != lock:
+                continue
+            out = rec[1:] + (lock >> 1,)
+            self._cache = out
+            return out
+        return None
+
+    def producer_pid(self) -> Optional[int]:
+        magic, pid = _HEADER.unpack_from(self._buf, 0)
+        return pid if magic == _MAGIC else None
+
+    # ---- command forwarding ----
+    def serve_commands(self, handler: Callable[..., dict]):
+        """Producer: answers forwarded commands on a Unix socket (daemon thread)."""
+        if os.path.exists(self.sock_path):
+            os.unlink(self.sock_path)
+        listener = Listener(self.sock_path, family="AF_UNIX", authkey=self._authkey)
+
+        def _serve():
+            while True:
+                # One bad connection (failed auth, garbage, a handler error)
+                # must not stop the server: every forwarded call would hang
+                try:
+                    with listener.accept() as conn:
+                        command, args = conn.recv()
+                        try:
+                            reply = handler(command, *args)
+                        except Exception as e:
+                            reply = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+                        conn.send(reply)
+                except Exception as e:
+                    print(f"Gaze command socket error: {type(e).__name__}: {e}")
+
+        threading.Thread(target=_serve, name="gaze_commands", daemon=True).start()
+
+    def call(self, command: str, *args, timeout: float = 2.0) -> dict:
+        """Follower: runs `command(*args)` on the producer and returns its reply."""
+        with Client(self.sock_path, family="AF_UNIX", authkey=self._authkey) as conn:
+            conn.send((command, args))
+            if not conn.poll(timeout):
+                raise TimeoutError(f"Gaze producer did not answer {command!r}")
+            reply = conn.recv()
+        if "error" in reply:
+            raise RuntimeError(f"Gaze producer failed {command!r}: {reply['error']}")
+        return reply
+
+    def status(self) -> dict:
+        return {"shared": True, "producer": self.is_producer, "producer_pid": self.producer_pid()}
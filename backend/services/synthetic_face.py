@@ -0,0 +1,92 @@
+"""Synthetic face landmarks with a known gaze target.
+
+Produces (478, 3) landmark arrays shaped like FaceLandmarker output so the
+gaze pipeline can be replayed and benchmarked without a camera.
+"""
+from typing import Optional, Tuple
+
+import numpy as np
+
+from services.gaze_features import (
+    LEFT_IRIS_IDX, RIGHT_IRIS_IDX,
+    L_INNER, L_OUTER, R_INNER, R_OUTER,
+    EYEBROW_STABLE, CHEEKBONE_STABLE, R_EYEBROW_STABLE, R_CHEEKBONE_STABLE,
+    NOSE_TIP,
+)
+
+NUM_LANDMARKS = 478
+
+# Eyelids (upper, lower) per eye, used by blink detection
+_LIDS = ((159, 145), (386, 374))
+
+# Angular extent of the screen as seen by the student (radians, full width/height)
+SCREEN_FOV_X = 0.60
+SCREEN_FOV_Y = 0.40
+
+# Head model in inter-ocular units (x right, y down, z away from camera)
+_EYE_X = 0.5
+_EYE_HALF_W = 0.2
+_EYEBALL_R = 0.12
+_IRIS_RING = 0.045
+_FACE_SCALE = 0.12  # inter-ocular distance as a fraction of frame width
+
+_BASE = np.zeros((NUM_LANDMARKS, 3))
+for _side, (_lo, _hi, _brow, _cheek) in zip(
+    (-1, 1),
+    ((L_OUTER, L_INNER, EYEBROW_STABLE, CHEEKBONE_STABLE),
+     (R_INNER, R_OUTER, R_EYEBROW_STABLE, R_CHEEKBONE_STABLE)),
+):
+    _cx = _side * _EYE_X
+    _BASE[_lo] = (_cx - _EYE_HALF_W, 0.0, 0.0)
+    _BASE[_hi] = (_cx + _EYE_HALF_W, 0.0, 0.0)
+    _BASE[_brow] = (_cx, -0.35, -0.02)
+    _BASE[_cheek] = (_cx, 0.40, -0.02)
+_BASE[[_LIDS[0][0], _LIDS[1][0]]] = [(-_EYE_X, -0.09, -0.01), (_EYE_X, -0.09, -0.01)]
+_BASE[[_LIDS[0][1], _LIDS[1][1]]] = [(-_EYE_X, 0.09, -0.01), (_EYE_X, 0.09, -0.01)]
+_BASE[NOSE_TIP] = (0.0, 0.45, -0.40)
+
+_RING = np.array([[0, 0], [1, 0], [0, -1], [-1, 0], [0, 1]], dtype=np.float64) * _IRIS_RING
+
+
+def _rotation(yaw: float, pitch: float) -> np.ndarray:
+    """Positive yaw turns the face toward image-right, positive pitch toward image-down."""
+    cy, sy = np.cos(yaw), np.sin(yaw)
+    cp, sp = np.cos(pitch), np.sin(pitch)
+    ry = np.array([[cy, 0, -sy], [0, 1, 0], [sy, 0, cy]])
+    rx = np.array([[1, 0, 0], [0, cp, -sp], [0, sp, cp]])
+    return ry @ rx
+
+
+def render_landmarks(
+    target: Tuple[float, float],
+    head_yaw: float = 0.0,
+    head_pitch: float = 0.0,
+    head_offset: Tuple[float, float] = (0.0, 0.0),
+    noise: float = 0.0,
+    rng: Optional[np.random.Generator] = None,
+) -> np.ndarray:
+    """Landmarks for a face looking at screen point `target` (normalised 0..1)."""
+    gaze_yaw = (target[0] - 0.5) * SCREEN_FOV_X
+    gaze_pitch = (target[1] - 0.5) * SCREEN_FOV_Y
+    eye_yaw, eye_pitch = gaze_yaw - head_yaw, gaze_pitch - head_pitch
+
+    pts = _BASE.copy()
+    for side, idxs in zip((-1, 1), (LEFT_IRIS_IDX, RIGHT_IRIS_IDX)):
+        centre = np.array([side * _EYE_X, 0.0, _EYEBALL_R])
+        iris = centre + _EYEBALL_R * np.array([np.sin(eye_yaw), np.sin(eye_pitch), -np.cos(eye_yaw)])
+        pts[list(idxs), :2] = iris[:2] + _RING
+        pts[list(idxs), 2] = iris[2]
+
+    pts = pts @ _rotation(head_yaw, head_pitch).T
+    pts[:, :2] = pts[:, :2] * _FACE_SCALE + (0.5 + head_offset[0], 0.45 + head_offset[1])
+    if noise:
+        rng = rng or np.random.default_rng()
+        pts[:, :2] += rng.normal(0.0, noise, size=(NUM_LANDMARKS, 2))
+    return pts
+
+
+def head_matrix(head_yaw: float, head_pitch: float) -> np.ndarray:
+    """4x4 transform matching FaceLandmarker's facial_transformation_matrixes layout."""
+    m = np.eye(4)
+    m[:3, :3] = _rotation(-head_yaw, head_pitch)
+    return m
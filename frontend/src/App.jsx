@@ -3,9 +3,20 @@ import CalibrateOverlay from "./components/CalibrateOverlay";
 import GazeDot from "./components/GazeDot";
 import GazeQuestionsGrid from "./components/GazeQuestionsGrid";
 import { useSpeechToText } from "./hooks/useSpeechToText";
+import { useLectureQuestions } from "./hooks/useLecture";
+import { useLiveQuestions } from "./hooks/useLiveQuestions";
+import { createLecture, postLectureTranscript } from "./api/lectureApi";
 
 const API_BASE = "https://burberryhim.onrender.com";
 
+// Lecture mode: ?lecture=<id> subscribes to the class broadcast;
+// adding &token=<lecturer token> makes this device the lecture's transcript source.
+// ?lecture=new starts a lecture and reloads as its lecturer.
+const URL_PARAMS = new URLSearchParams(window.location.search);
+const LECTURE_ID = URL_PARAMS.get("lecture");
+const LECTURE_TOKEN = URL_PARAMS.get("token");
+const LECTURE_NEW = LECTURE_ID === "new";
+
 export default function App() {
   const [questions, setQuestions] = useState([]);
   const [isRecording, setIsRecording] = useState(false);
@@ -13,11 +24,14 @@ export default function App() {
   const [isTranscribing, setIsTranscribing] = useState(false); // NEW: drive loading overlay
 
   const fetchingRef = useRef(false); // prevent double-fetch race
+  const lectureSentRef = useRef(0); // chars of finalTranscript already sent to the lecture
+  const lectureDirtyRef = useRef(false); // sent text the server hasn't been told to flush
 
   const {
     isSupported,
     isListening,
     transcript,
+    interimTranscript,
     finalTranscript,
     error,
     start,
@@ -61,13 +75,61 @@ export default function App() {
     }
   }
 
+  // lecturer: create the lecture, then reload with its id and token
+  useEffect(() => {
+    if (!LECTURE_NEW) return;
+    createLecture()
+      .then(({ lecture_id, token }) => {
+        window.location.search = `?lecture=${lecture_id}&token=${encodeURIComponent(token)}`;
+      })
+      .catch((e) => console.error("Failed to create lecture:", e));
+  }, []);
+
+  // lecture student: questions arrive from the broadcast
+  const lectureQuestions = useLectureQuestions(LECTURE_TOKEN || LECTURE_NEW ? null : LECTURE_ID);
+  useEffect(() => {
+    if (!lectureQuestions) return;
+    setQuestions(lectureQuestions.questions);
+    setLastPrompt(lectureQuestions.prompt);
+  }, [lectureQuestions]);
+
+  // lecturer: stream new final text to the server, which segments it
+  useEffect(() => {
+    if (!LECTURE_ID || !LECTURE_TOKEN || LECTURE_NEW) return;
+    const delta = finalTranscript.slice(lectureSentRef.current).trim();
+    lectureSentRef.current = finalTranscript.length;
+    const flush = !isListening; // stopped talking: close the current segment
+    if (!delta && !(flush && lectureDirtyRef.current)) return;
+    lectureDirtyRef.current = !flush;
+    postLectureTranscript(LECTURE_ID, LECTURE_TOKEN, delta, flush).catch((e) =>
+      console.error("Failed to post lecture transcript:", e)
+    );
+  }, [finalTranscript, isListening]);
+
+  // questions generated on the server while the user is still talking
+  const live = useLiveQuestions({
+    enabled: !LECTURE_ID,
+    isListening,
+    finalTranscript,
+    interimTranscript,
+  });
+  useEffect(() => {
+    if (!live.latest) return;
+    setQuestions(live.latest.questions);
+    setLastPrompt(live.latest.prompt);
+    if (live.latest.final) setIsTranscribing(false);
+  }, [live.latest]);
+
   // when user stops talking and final transcript arrives -> generate questions
+  // (only if the live session failed; otherwise it delivers the final set)
   useEffect(() => {
+    if (LECTURE_ID) return; // lecture mode: questions come from the broadcast
+    if (live.usable) return;
     // Only fire once per stop: when listening becomes false AND we have finalTranscript
     if (!isListening && finalTranscript) {
       fetchQuestions(finalTranscript);
     }
-  }, [isListening, finalTranscript]); // ok
+  }, [isListening, finalTranscript, live.usable]); // ok
 
   function startRecording() {
     if (!isSupported) return;
@@ -75,6 +137,7 @@ export default function App() {
 
     // reset UI state
     reset();
+    lectureSentRef.current = 0;
     setQuestions([]);
     setLastPrompt("");
 
@@ -88,12 +151,14 @@ export default function App() {
 
     // show overlay while we wait for finalTranscript + backend question gen
     // (if finalTranscript comes instantly, the effect will flip it off quickly)
-    setIsTranscribing(true);
+    // lecture mode has no local question fetch to wait for
+    if (!LECTURE_ID) setIsTranscribing(true);
   }
 
   function clearAll() {
     stop();
     reset();
+    lectureSentRef.current = 0;
     setQuestions([]);
     setLastPrompt("");
     setIsTranscribing(false);
@@ -114,6 +179,26 @@ export default function App() {
       <CalibrateOverlay />
       <GazeDot />
 
+      {LECTURE_TOKEN && (
+        <div
+          style={{
+            position: "fixed",
+            top: 8,
+            left: "50%",
+            transform: "translateX(-50%)",
+            zIndex: 10,
+            padding: "6px 12px",
+            borderRadius: 8,
+            background: "rgba(0,0,0,0.6)",
+            color: "#fff",
+            fontSize: 14,
+          }}
+        >
+          Students join at{" "}
+          {`${window.location.origin}${window.location.pathname}?lecture=${LECTURE_ID}`}
+        </div>
+      )}
+
       <GazeQuestionsGrid
         questions={questions}
         prompt={lastPrompt}
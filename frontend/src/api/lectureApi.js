@@ -0,0 +1,17 @@
+const API_BASE = "https://burberryhim.onrender.com";
+
+export async function createLecture() {
+  const res = await fetch(`${API_BASE}/lecture`, { method: "POST" });
+  if (!res.ok) throw new Error(await res.text());
+  return res.json(); // { lecture_id, token }
+}
+
+export async function postLectureTranscript(lectureId, token, text, final = false) {
+  const res = await fetch(`${API_BASE}/lecture/${lectureId}/transcript`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json", "X-Lecture-Token": token },
+    body: JSON.stringify({ text, final }),
+  });
+  if (!res.ok) throw new Error(await res.text());
+  return res.json();
+}
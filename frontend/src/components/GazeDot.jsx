@@ -3,7 +3,12 @@ import { useGaze } from "../hooks/useGaze";
 import { captureCalibration, resetCalibration } from "../api/gazeApi";
 
 export default function GazeDot() {
-  const { x, y, calibrated, blink } = useGaze();
+  // The dot is drawn where the eye is now (predicted); selection logic
+  // elsewhere keeps using the measured x/y.
+  const gaze = useGaze({ predict: true });
+  const { calibrated, blink } = gaze;
+  const x = gaze.px ?? gaze.x;
+  const y = gaze.py ?? gaze.y;
   const lastBlinkTime = useRef(0);
   const blinkStartRef = useRef(null); // Track when current blink started
 
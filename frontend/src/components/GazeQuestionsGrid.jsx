@@ -30,6 +30,24 @@ function normalizeXY(x, y) {
   return { nx: (x ?? 0) / w, ny: (y ?? 0) / h };
 }
 
+// POST JSON; on 503 (server shedding load) wait for Retry-After and try once more
+async function postJson(path, body) {
+  const send = () =>
+    fetch(`${API_BASE}${path}`, {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify(body),
+    });
+  let res = await send();
+  if (res.status === 503) {
+    const wait = Math.min(Number(res.headers.get("Retry-After")) || 1, 5);
+    await new Promise((r) => setTimeout(r, wait * 1000));
+    res = await send();
+  }
+  if (!res.ok) throw new Error(await res.text());
+  return res.json();
+}
+
 function clamp01(v) {
   return Math.max(0, Math.min(1, v));
 }
@@ -383,26 +401,14 @@ export default function GazeQuestionsGrid({
     try {
       // 1) explanation (BLOCKING overlay)
       setLoadingExplanation(true);
-      const res = await fetch(`${API_BASE}/get-educational-explanation`, {
-        method: "POST",
-        headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ prompt, question }),
-      });
-      if (!res.ok) throw new Error(await res.text());
-      const data = await res.json();
+      const data = await postJson("/get-educational-explanation", { prompt, question });
       const text = (data.explanation || "").trim();
       setExplanation(text);
       setLoadingExplanation(false);
 
       // 2) followups (non-blocking; UI stays visible)
       setLoadingFollowups(true);
-      const qRes = await fetch(`${API_BASE}/get-followup-questions`, {
-        method: "POST",
-        headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ prompt, question, explanation: text }),
-      });
-      if (!qRes.ok) throw new Error(await qRes.text());
-      const qData = await qRes.json();
+      const qData = await postJson("/get-followup-questions", { prompt, question, explanation: text });
       const fqs = Array.isArray(qData.followups) ? qData.followups : [];
       setFollowUps(fqs.slice(0, 2));
     } catch (e) {
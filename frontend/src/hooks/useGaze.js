@@ -1,6 +1,7 @@
 import { useEffect, useRef, useState } from "react";
 
-export function useGaze() {
+// predict: also receive px/py, the server's latency-compensated position
+export function useGaze({ predict = false } = {}) {
   const [gaze, setGaze] = useState({
     x: 0.5,
     y: 0.5,
@@ -15,7 +16,9 @@ export function useGaze() {
     // Guard: don't create multiple sockets
     if (wsRef.current) return;
 
-    const ws = new WebSocket("ws://burberryhim.onrender.com/gaze/ws");
+    const ws = new WebSocket(
+      `ws://burberryhim.onrender.com/gaze/ws${predict ? "?predict=1" : ""}`
+    );
     wsRef.current = ws;
 
     ws.onmessage = (evt) => {
@@ -37,7 +40,7 @@ export function useGaze() {
       wsRef.current?.close();
       wsRef.current = null;
     };
-  }, []);
+  }, [predict]);
 
   return gaze;
 }
@@ -0,0 +1,29 @@
+import { useEffect, useState } from "react";
+
+// Subscribes to a lecture broadcast; returns the newest { segment, prompt, questions }.
+export function useLectureQuestions(lectureId) {
+  const [latest, setLatest] = useState(null);
+
+  useEffect(() => {
+    if (!lectureId) return;
+
+    const ws = new WebSocket(`ws://burberryhim.onrender.com/lecture/${lectureId}/ws`);
+
+    ws.onmessage = (evt) => {
+      try {
+        const data = JSON.parse(evt.data);
+        if (data?.type === "questions" && Array.isArray(data.questions)) {
+          setLatest(data);
+        }
+      } catch (e) {
+        console.error("Bad lecture WS message:", e);
+      }
+    };
+
+    ws.onerror = (e) => console.error("lecture ws error:", e);
+
+    return () => ws.close();
+  }, [lectureId]);
+
+  return latest;
+}
@@ -0,0 +1,96 @@
+import { useEffect, useRef, useState } from "react";
+
+const LIVE_WS_URL = "ws://burberryhim.onrender.com/questions/live";
+const FINAL_WAIT_MS = 15000; // give up on the final set after stopping
+
+// Streams the transcript to the server while the user talks. The server
+// debounces, regenerates when enough has changed and pushes each newer set.
+// Returns { latest, usable }: latest = { version, prompt, questions, final }
+// and usable = false once the socket failed (caller falls back to the REST route).
+export function useLiveQuestions({ enabled, isListening, finalTranscript, interimTranscript }) {
+  const [latest, setLatest] = useState(null);
+  const [usable, setUsable] = useState(false);
+
+  const wsRef = useRef(null);
+  const sentRef = useRef(0); // chars of finalTranscript already sent
+  const stoppedRef = useRef(false); // user stopped talking; every send carries done
+  const textRef = useRef({ finalTranscript, interimTranscript });
+  textRef.current = { finalTranscript, interimTranscript };
+
+  function sendDelta() {
+    const ws = wsRef.current;
+    if (!ws || ws.readyState !== WebSocket.OPEN) return;
+    const { finalTranscript: fin, interimTranscript: interim } = textRef.current;
+    const delta = fin.slice(sentRef.current);
+    sentRef.current = fin.length;
+    const done = stoppedRef.current;
+    ws.send(JSON.stringify({ final: delta, interim: done ? "" : interim, done }));
+  }
+
+  // open a fresh session each time listening starts
+  useEffect(() => {
+    if (!enabled || !isListening) return;
+
+    wsRef.current?.close();
+    const ws = new WebSocket(LIVE_WS_URL);
+    wsRef.current = ws;
+    sentRef.current = 0;
+    stoppedRef.current = false;
+    setLatest(null);
+    setUsable(true);
+
+    ws.onopen = () => sendDelta();
+
+    ws.onmessage = (evt) => {
+      try {
+        const data = JSON.parse(evt.data);
+        if (data?.type === "questions" && Array.isArray(data.questions)) {
+          setLatest(data);
+          if (data.final) ws.close();
+        } else if (data?.type === "error" && stoppedRef.current) {
+          // the final set failed: fall back to the REST route now, not after FINAL_WAIT_MS
+          ws.close();
+          if (wsRef.current === ws) setUsable(false);
+        }
+      } catch (e) {
+        console.error("Bad live questions message:", e);
+      }
+    };
+
+    ws.onerror = (e) => {
+      console.error("live questions ws error:", e);
+      if (wsRef.current === ws) setUsable(false);
+    };
+  }, [enabled, isListening]);
+
+  // push every transcript change; the server decides when to generate
+  useEffect(() => {
+    if (isListening) sendDelta();
+  }, [finalTranscript, interimTranscript, isListening]);
+
+  // stopped talking: ask for the final set, then close
+  useEffect(() => {
+    const ws = wsRef.current;
+    if (isListening || !ws) return;
+
+    if (!textRef.current.finalTranscript.trim()) {
+      ws.close();
+      wsRef.current = null;
+      return;
+    }
+    stoppedRef.current = true;
+    sendDelta();
+    const timer = setTimeout(() => {
+      if (ws.readyState !== WebSocket.CLOSED) {
+        ws.close();
+        setUsable(false);
+      }
+    }, FINAL_WAIT_MS);
+    return () => clearTimeout(timer);
+  }, [isListening, finalTranscript]);
+
+  // close on unmount
+  useEffect(() => () => wsRef.current?.close(), []);
+
+  return { latest, usable };
+}